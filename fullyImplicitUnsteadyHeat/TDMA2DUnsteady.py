@@ -1,236 +1,152 @@
 # TDMA2DUnsteady class used for solving 2D unsteady heat conduction problems
 # coordinates are assumed cartesian with uniform grid spacing
-# boundary conditions are assumed Dirichlet
-# a coupled material can be included via the source terms
+# boundary conditions are assumed Dirichlet, or periodic per direction through the TDMA2D options
+# a coupled material can be included via the source terms, sC and sP may be scalars or per cell arrays
 # this class uses line by line solving, sweeping both horizontally and vertically
+# the sweeps are inherited from TDMA2D, this class only adds the transient and source contributions
+# one object can be stepped through a whole transient with advance(), reusing its buffers and factors
 # Author: Jesse Blankenship
-# Last Updated: 10/01/2025
+# Last Updated: 10/18/2026
 
+import os
+import sys
 import numpy as np
+# the steady solver and its helpers live in thomasAlgorithm
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'thomasAlgorithm'))
+from TDMA2D import TDMA2D
 
-class TDMA2DUnsteady:
+class TDMA2DUnsteady(TDMA2D):
 
-    def __init__ (self, nX, nY, width, height, T_prev, tau, gamma, tol, maxIter, TLeft, TRight, TTop, TBottom, sC, coupledPrev, sP):
-        self.nX = nX
-        self.nY = nY
-        self.deltaX = width/(nX-1)
-        self.deltaY = height/(nY-1)
-        self.T_prev = T_prev  # initialize temperature array
+    def __init__ (self, nX, nY, width, height, T_prev, tau, gamma, tol, maxIter, TLeft, TRight, TTop, TBottom, sC, coupledPrev, sP, **options):
         self.tau = tau # non-dimensional time step
-        self.gamma = gamma # diffusion coefficient (thermal conductivity)
-        self.tol = tol
-        self.maxIter = maxIter
-        self.TLeft = TLeft
-        self.TRight = TRight
-        self.TTop = TTop
-        self.TBottom = TBottom
         self.sC = sC # source term coefficient
         self.sP = sP # source term coefficient
-        self.T = np.zeros((nY, nX))  # solution array
-        self.ap0 = self.deltaX * self.deltaY / self.tau
-        self.coupledPrev = coupledPrev # this is the previous timesteps solution of the coupled material, should be a 2D array
-
-        # the coefficients are sized assuming a square domain
-        self.a = np.zeros((nY, 1))
-        self.b = np.zeros((nY, 1))
-        self.c = np.zeros((nY, 1))
-        self.d = np.zeros((nY, 1))
-
-    def tdmaSolver(self, a, b, c, d):
-        nPoints = np.size(a)
-        
-        # Initialize arrays
-        P = np.zeros(nPoints)
-        Q = np.zeros(nPoints)
-        phi = np.zeros(nPoints)
-
-        P[0] = b[0]/a[0]
-        Q[0] = d[0]/a[0]
-        for i in range(1, nPoints):
-            P[i] = b[i]/(a[i]-c[i]*P[i-1])
-            Q[i] = (d[i] + c[i]*Q[i-1])/(a[i] - c[i]*P[i-1])
-        
-        phi[-1] = Q[-1]
-        for i in range(nPoints-2, -1, -1):
-            phi[i] = P[i]*phi[i+1] + Q[i]
-
-        return phi
-    
-    def horizontalSweep(self):
-        nX = self.nX
-        nY = self.nY
-        deltaX = self.deltaX
-        deltaY = self.deltaY
-        gamma = self.gamma
-        T_prev = self.T_prev
-        T = self.T
-        a = self.a
-        b = self.b
-        c = self.c
-        d = self.d
-        ap0 = self.ap0
-        sC = self.sC
-        coupledPrev = self.coupledPrev
-        sP = self.sP
-        dV = deltaX * deltaY
-        tBcLeft = self.TLeft
-        tBcRight = self.TRight
-        tBcTop = self.TTop
-        tBcBottom = self.TBottom
-        for i in range(nX):
-            if i == 0: # this is the first vertical line
-                for j in range(nY): # build the coefficients for the first vertical line
-                    if j == 0: # bottom left corner
-                        # north, south, east, west, ap0, source
-                        a[j] = gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + ap0 - sP*dV
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        # south, east, west, ap0, source
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/(deltaX/2))*tBcLeft + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    elif j == nY-1: # top left corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2)) + ap0 - sP*dV
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX) * T_prev[j,i+1] +(gamma*deltaY/(deltaX/2))*tBcLeft + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    else: # left edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2)) + ap0 - sP*dV
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/(deltaX/2))*tBcLeft + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-            elif i == nX-1: # this is the last vertical line
-                for j in range(nY): # build the coefficients for the last vertical line
-                    if j == 0: # bottom right corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2)) + ap0 - sP*dV
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    elif j == nY-1: # top right corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2)) + ap0 - sP*dV
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    else: # right edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2)) + ap0 - sP*dV
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-            else: # this is an interior vertical line
-                for j in range(nY): # build the coefficients for this interior vertical line
-                    if j == 0: # bottom edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/deltaX) + ap0 - sP*dV
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1] + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    elif j == nY-1: # top edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/deltaX) + ap0 - sP*dV
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1] + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                    else: # interior points
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/deltaX) + ap0 - sP*dV
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1] + ap0*T_prev[j,i] + sC*coupledPrev[j,i]*dV
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-        return T
-
-    def verticalSweep(self):
-        nX = self.nX
-        nY = self.nY
-        deltaX = self.deltaX
-        deltaY = self.deltaY
-        gamma = self.gamma
-        T = self.T
-        a = self.a
-        b = self.b
-        c = self.c
-        d = self.d
-        ap0 = self.ap0
-        sP = self.sP
-        sC = self.sC
-        coupledPrev = self.coupledPrev
-        dV = deltaX * deltaY
-        tBcLeft = self.TLeft
-        tBcRight = self.TRight
-        tBcTop = self.TTop
-        tBcBottom = self.TBottom
-        for j in range(nY):
-                if j == 0: # this is the first (bottom) horizontal line
-                    for i in range(nX): # build the coefficients for the first horizontal line
-                        if i == 0: # bottom left corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j+1,i] +(gamma*deltaX/(deltaY/2))*tBcBottom + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        elif i == nX-1: # bottom right corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j+1,i] +(gamma*deltaX/(deltaY/2))*tBcBottom + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        else: # bottom edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/(deltaY/2))*tBcBottom + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-                elif j == nY-1: # this is the last horizontal line (top)
-                    for i in range(nX): # build the coefficients for the last horizontal line
-                        if i == 0: # top left corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        elif i == nX-1: # top right corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        else: # top edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2)) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-                else: # this is an interior horizontal line
-                    for i in range(nX): # build the coefficients for this interior horizontal line
-                        if i == 0: # left edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/deltaY) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i] + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        elif i == nX-1: # right edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/deltaY) + ap0 - sP*dV
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i] + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                        else: # interior points
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/deltaY) + ap0 - sP*dV
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i] + ap0*T[j,i] + sC*coupledPrev[j,i]*dV
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-        return T
-
-    def solve(self):
-        # method to sweep horizontally and vertically
-        maxIter = self.maxIter
-        iter = 0
-        while iter < maxIter:
-            self.horizontalSweep()
-            self.verticalSweep()
-            # convergence check
-            if np.max(np.abs(self.T - self.T_prev)) < self.tol:
-                break
-
-            self.T_prev = np.copy(self.T)
-            iter += 1
+        # the parent assembles and factors the stencil, which needs the attributes above
+        # options are the TDMA2D keyword options (lineOrder, omega, ...)
+        super().__init__(nX, nY, width, height, gamma, tol, maxIter, TLeft, TRight, TTop, TBottom, **options)
+        # the fields of the transient are held in the working precision (dtype option) like the solution
+        self.TOld = np.zeros((nY, nX), dtype=self.dtype) # solution at the previous time step, fixed while a step is solved
+        self.coupledPrev = np.zeros((nY, nX), dtype=self.dtype) # this is the previous timesteps solution of the coupled material
+        self.rhs = np.zeros((nY, nX), dtype=self.dtype) # b + ap0*TOld + coupled source, constant within a time step
+        self.time = 0.0
+        self.stepCount = 0
+        self.stepChange = 0.0 # max change of the field over the last time step
+        self.setPrevious(T_prev, coupledPrev)
 
+    def assembleCoefficients(self):
+        # steady stencil plus the transient and linearized source contributions to aP
+        aP, aN, aS, aE, aW, b = super().assembleCoefficients()
+        dV = self.deltaX * self.deltaY
+        self.ap0 = dV / self.tau
+        self.stencilTau = self.tau # time step the stencil (and ap0) was last assembled for
+        aP += self.ap0 - self.sP*dV
+        return aP, aN, aS, aE, aW, b
+
+    def setPrevious(self, T_prev=None, coupledPrev=None):
+        # copies a new previous time step solution and/or coupled material field into the solver buffers
+        # the current iterate restarts from the previous time step
+        if T_prev is not None:
+            np.copyto(self.TOld, T_prev)
+            np.copyto(self.T, T_prev)
+            np.copyto(self.T_prev, T_prev)
+            self.updateProperties()
+        if coupledPrev is not None:
+            np.copyto(self.coupledPrev, coupledPrev)
+        self.updateRightHandSide()
+
+    def factorize(self):
+        super().factorize()
+        self.factorsTau = self.stencilTau # time step of the line factors
+
+    def setTimeStep(self, tau):
+        # ap0 sits on the diagonal, so a new time step needs the stencil rebuilt and refactored. That is left to
+        # the next advance (updateTimeStep), so restoring a state or trying several steps in a row costs nothing.
+        self.tau = tau
+
+    def updateTimeStep(self, factorize=True):
+        # rebuilds the stencil for the current tau, and the line factors unless factorize is False (the coupled
+        # solver only reads the stencil of its fields)
+        if self.stencilTau != self.tau:
+            with self.phase('assembly'):
+                self.setCoefficients(*self.assembleCoefficients())
+        if factorize and self.factorsTau != self.tau:
+            with self.phase('factorize'):
+                self.factorize()
+
+    def restart(self, T_prev, coupledPrev, tau=None, gamma=None, sC=None, sP=None):
+        # starts a new transient on the same grid and boundaries, reusing the buffers of this solver
+        # the time step and material properties left as None are kept, the stencil is rebuilt either way
+        if tau is not None:
+            self.tau = tau
+        if sC is not None:
+            self.sC = sC
+        if sP is not None:
+            self.sP = sP
+        if gamma is not None:
+            self.gammaFunction = gamma if callable(gamma) else None
+            self.gamma = None if callable(gamma) else gamma
+        np.copyto(self.T, T_prev)
+        self.evaluateProperties(self.T)
+        self.updateCoefficients()
+        self.setPrevious(T_prev, coupledPrev)
+        self.time = 0.0
+        self.stepCount = 0
+        self.stepChange = 0.0
+
+    def updateRightHandSide(self):
+        # the ap0 and coupled source terms only change between time steps
+        dV = self.deltaX * self.deltaY
+        rhs = self.rhs
+        np.multiply(self.TOld, self.ap0, out=rhs)
+        rhs += self.b
+        np.multiply(self.coupledPrev, self.sC*dV, out=self.work)
+        rhs += self.work
+
+    def exactRightHandSide(self, b):
+        # double precision counterpart of updateRightHandSide, for refinement
+        dV = self.deltaX * self.deltaY
+        return b + self.ap0*self.TOld.astype(float) + self.sC*dV*self.coupledPrev.astype(float)
+
+    def advance(self, dt=None, sourceField=None, initialGuess=None):
+        # solves one time step from TOld and makes the result the new TOld
+        # sourceField replaces the coupled material field for this step
+        # initialGuess (scalar or field) is where the iteration starts instead of TOld, e.g. an extrapolation
+        if dt is not None:
+            self.setTimeStep(dt)
+        self.updateTimeStep()
+        with self.phase('rightHandSide'):
+            if sourceField is not None:
+                np.copyto(self.coupledPrev, sourceField)
+            self.updateRightHandSide()
+            np.copyto(self.T, self.TOld if initialGuess is None else initialGuess)
+            np.copyto(self.T_prev, self.T)
+        self.solve()
+
+        with self.phase('stepUpdate'):
+            work = self.work
+            np.subtract(self.T, self.TOld, out=work)
+            np.abs(work, out=work)
+            self.stepChange = work.max()
+            np.copyto(self.TOld, self.T)
+        self.time += self.tau
+        self.stepCount += 1
+        if self.profiler is not None:
+            self.profiler.step(self)
         return self.T
+
+    def getState(self):
+        # copy of everything a time step changes, for rejecting a step or restarting from it
+        return {"TOld": self.TOld.copy(), "coupledPrev": self.coupledPrev.copy(), "tau": self.tau,
+                "time": self.time, "stepCount": self.stepCount, "stepChange": self.stepChange}
+
+    def setState(self, state):
+        # restores a state taken with getState, the stencil follows the restored tau at the next advance
+        self.setTimeStep(state["tau"])
+        self.setPrevious(state["TOld"], state["coupledPrev"])
+        self.time = state["time"]
+        self.stepCount = state["stepCount"]
+        self.stepChange = state["stepChange"]
+
+    def step(self):
+        # one time step with the current time step size and coupled field
+        return self.advance()
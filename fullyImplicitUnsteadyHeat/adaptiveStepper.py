@@ -0,0 +1,111 @@
+# AdaptiveStepper drives TDMA2DUnsteady solvers through a transient with an adaptive time step.
+# The local truncation error of each fully implicit step is estimated by step doubling: the step is taken
+# once with dt and again as two steps of dt/2, and the difference of the two results is the error estimate.
+# Steps whose error exceeds the tolerance are rejected and retried with a smaller dt, accepted steps keep the
+# two half step result and the next dt grows or shrinks with sqrt(tol/error) within the given bounds.
+# The estimate only measures truncation error when the solves themselves are much more accurate than tol,
+# so the iteration tolerance of every field must be at most solverTolRatio*tol.
+# With levels set, the time step is rounded down to the ladder dt0*2**(k/levels). Step sizes then recur, and
+# dt/2 of one step is the dt of an earlier one, so solvers that keep factors per step size (the direct
+# coupled solve) rarely refactor.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+
+class AdaptiveStepper:
+
+    solverTolRatio = 1e-2 # largest ratio of the iteration tolerance of the fields to the error tolerance
+    substeps = 2 # implicit steps an accepted step is made of (the two half steps)
+
+    def __init__(self, fields, advance, dt, tol, dtMin=1e-6, dtMax=np.inf, safety=0.9, maxGrowth=2.0, minShrink=0.2, levels=None):
+        """
+        Parameters:
+        fields (list): TDMA2DUnsteady solvers advanced together
+        advance (callable): advance(dt) takes one time step of size dt for all fields
+                            (e.g. CoupledTDMA2DUnsteady.advance or a staggered step)
+        dt (float): initial time step
+        tol (float): largest accepted change between the one step and two half step solutions
+        dtMin, dtMax (float): bounds of the time step, a step at dtMin is accepted whatever its error
+        safety (float): factor applied to the predicted time step
+        maxGrowth, minShrink (float): bounds of the change of dt from one step to the next
+        levels (int): step sizes per doubling of dt that the step is rounded down to, any size when None
+        """
+        for field in fields:
+            # a field converged on its residual is not limited by its update tolerance
+            if field.residualTol is None and field.tol > self.solverTolRatio*tol:
+                raise ValueError("the iteration tolerance of the fields (%g) must be at most %g times the error tolerance (%g), "
+                                 "otherwise the error estimate measures the unconverged iteration" % (field.tol, self.solverTolRatio, tol))
+        self.fields = fields
+        self.advanceFields = advance
+        self.dt = dt
+        self.tol = tol
+        self.dtMin = dtMin
+        self.dtMax = dtMax
+        self.safety = safety
+        self.maxGrowth = maxGrowth
+        self.minShrink = minShrink
+        self.levels = levels
+        self.dtBase = dt # origin of the ladder of step sizes
+        self.time = fields[0].time
+        self.log = [] # one entry per attempted step: time, dt, error, accepted
+        self.accepted = 0
+        self.rejected = 0
+
+    def step(self):
+        # attempts steps until one is accepted, returns the time step that was taken
+        while True:
+            dt = self.dt
+            start = [field.getState() for field in self.fields]
+
+            self.advanceFields(dt)
+            full = [field.T.copy() for field in self.fields]
+            for field, state in zip(self.fields, start):
+                field.setState(state)
+            self.advanceFields(0.5*dt)
+            self.advanceFields(0.5*dt)
+            error = max(np.abs(field.T - T).max() for field, T in zip(self.fields, full))
+
+            accept = error <= self.tol or dt <= self.dtMin
+            self.log.append({"time": self.time + dt if accept else self.time, "dt": dt, "error": float(error), "accepted": accept})
+            # the error of a first order step grows with dt^2
+            factor = self.maxGrowth if error == 0 else self.safety*np.sqrt(self.tol/error)
+            self.dt = self.snap(min(max(dt*min(max(factor, self.minShrink), self.maxGrowth), self.dtMin), self.dtMax))
+
+            if accept:
+                self.accepted += 1
+                self.time += dt
+                for field, state in zip(self.fields, start):
+                    field.stepCount = state["stepCount"] + 1
+                    field.stepChange = np.abs(field.T - state["TOld"]).max()
+                return dt
+            self.rejected += 1
+            for field, state in zip(self.fields, start):
+                field.setState(state)
+
+    def snap(self, dt):
+        # the largest step of the ladder not above dt (the small tolerance absorbs the rounding of the ladder)
+        if self.levels is None:
+            return dt
+        level = np.floor(np.log2(dt/self.dtBase)*self.levels + 1e-9)
+        return max(self.dtBase*2.0**(level/self.levels), self.dtMin)
+
+    def getState(self):
+        # controller state for checkpointing, the log as one array per column
+        return {"dt": self.dt, "time": self.time, "accepted": self.accepted, "rejected": self.rejected,
+                "log": {key: np.array([entry[key] for entry in self.log]) for key in ("time", "dt", "error", "accepted")}}
+
+    def setState(self, state):
+        # restores a state taken with getState
+        self.dt = state["dt"]
+        self.time = state["time"]
+        self.accepted = state["accepted"]
+        self.rejected = state["rejected"]
+        log = state["log"]
+        self.log = [{"time": float(t), "dt": float(dt), "error": float(error), "accepted": bool(accepted)}
+                    for t, dt, error, accepted in zip(log["time"], log["dt"], log["error"], log["accepted"])]
+
+    def acceptedSteps(self):
+        # times, time steps and error estimates of the accepted steps
+        steps = [entry for entry in self.log if entry["accepted"]]
+        return np.array([e["time"] for e in steps]), np.array([e["dt"] for e in steps]), np.array([e["error"] for e in steps])
@@ -0,0 +1,50 @@
+# checkpoint saves and restores the state of a transient run so it can resume after being stopped.
+# A state is a nested dict of arrays and numbers (e.g. the getState of every solver, stepper and writer),
+# stored as one uncompressed .npz file whose keys are the '/' joined paths of the entries. None entries are
+# left out and come back as missing keys. The file is written under a temporary name, synced and renamed,
+# so a run killed while checkpointing still finds the previous checkpoint intact.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import os
+import numpy as np
+
+def flatten(state, prefix=''):
+    # nested dict -> {path: array}
+    arrays = {}
+    for name, value in state.items():
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            arrays.update(flatten(value, prefix + name + '/'))
+        else:
+            arrays[prefix + name] = np.asarray(value)
+    return arrays
+
+def saveCheckpoint(path, state):
+    """
+    Writes a state atomically.
+
+    Parameters:
+    path (str): checkpoint file
+    state (dict): nested dict of arrays and numbers
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        np.savez(file, **flatten(state))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def loadCheckpoint(path):
+    # the state saved by saveCheckpoint, with scalars returned as Python numbers
+    state = {}
+    with np.load(path) as data:
+        for key in data.files:
+            value = data[key]
+            *parents, name = key.split('/')
+            entry = state
+            for parent in parents:
+                entry = entry.setdefault(parent, {})
+            entry[name] = value.item() if value.ndim == 0 else value
+    return state
@@ -2,11 +2,20 @@
 # The problem considers coupled transient heat conduction between a metallic foam and a paraffin.
 # The problem is discretized in time using a fully implicit scheme.
 # Author: Jesse Blankenship
-# Last Updated: 10/01/2025
+# Last Updated: 10/18/2026
 
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'thomasAlgorithm'))
 from TDMA2DUnsteady import TDMA2DUnsteady
+from coupledTDMA2DUnsteady import CoupledTDMA2DUnsteady
+from adaptiveStepper import AdaptiveStepper
+from steadyStateDetector import SteadyStateDetector
+from snapshotWriter import SnapshotWriter
+from solverProfiler import SolverProfiler
+from checkpoint import saveCheckpoint, loadCheckpoint
 import time
 
 # Problem parameters
@@ -23,6 +32,7 @@ thetaBcLeft = 0.0 # Dirichlet left BC
 thetaBcRight = 1.0  # Dirichlet right BC
 thetaBcTop = 0.0 # Dirichlet top BC
 thetaBcBottom = 1.0 # Dirichlet bottom BC
+# any face also takes a boundaryConditions object, e.g. Neumann(0.0) for an insulated wall or Robin(h, thetaInf)
 height = 1.0  # domain height (corresponds to non-dimensional y)
 width = 1.0  # domain width (corresponds to non-dimensional x)
 nX = 50 # number of cell centroids in x
@@ -31,69 +41,161 @@ deltaX = width / (nX - 1) # distance between centroids in x
 deltaY = height / (nY - 1) # distance between centroids in y
 maxIter = 1000
 tolerance = 1e-3 # convergence tolerance of solution at each timestep
-timeStep = 0.01 # non-dimensional timestep size
+timeStep = 0.01 # non-dimensional timestep size (the initial one when adaptive)
+adaptive = False # adapt the timestep to the local truncation error estimated by step doubling
+errorTolerance = 1e-3 # largest accepted local error per timestep when adaptive
+maxTimeStep = 10.0 # upper bound of the adaptive timestep
+timeStepLevels = 2 # adaptive timesteps are rounded down to 2 sizes per doubling, so their factors can be reused
 steadyStateTolerance = 1e-6 # tolerance for steady state convergence in both materials
 maxTime = 100
-numberSteps = int(maxTime /  timeStep)
-
-# Initialize non-dimensional temperature array and coefficient arrays
-thetaM = np.zeros((nY, nX, numberSteps+1))
-thetaP = np.zeros((nY, nX, numberSteps+1))
+steadyShortcut = None # once the transient decays exponentially: 'extrapolate' to the steady state, 'direct' steady solve, None keeps stepping
+# the decay rate only settles when the solves are accurate well below the change per step, adaptive runs at the
+# default tolerances usually reach steady state before it does
+snapshotCadence = 100 # every snapshotCadence-th step is written to disk
+centerProbe = {"center": (nY//2, nX//2)} # points recorded at every time step
+profileFile = "solverProfile.json" # per phase timings and counters of the run are written here
+couplingMode = 'monolithic' # 'staggered' lags the paraffin behind the metal, 'monolithic' solves both implicitly together
+# the large adaptive steps take many sweeps, the sparse LU of the monolithic system solves them at once
+coupledMethod = 'direct' if adaptive else 'sweeps'
+precision = 'float64' # 'float32' halves the memory of the solvers and the size of the snapshot files
+checkpointFile = "checkpoint.npz" # the run state is saved here and a rerun resumes from it, None disables checkpoints
+checkpointInterval = 60.0 # wall clock seconds between checkpoints
+
+# Initialize non-dimensional temperature arrays
 thetaPrevM = np.zeros((nY, nX)) # initial condition is 0 throughout domain
 thetaPrevP = np.zeros((nY, nX)) # initial temperature distribution for paraffin
-thetaNumericalM = np.zeros((nY+2, nX+2, numberSteps+1))
-thetaNumericalP = np.zeros((nY+2, nX+2, numberSteps+1))
+
+# the profiler is shared by both solvers, so its phases add up the work of both materials
+profiler = SolverProfiler()
+
+# a checkpoint left behind by an interrupted run is picked up where that run stopped
+resume = checkpointFile is not None and os.path.exists(checkpointFile)
+
+# the time history is streamed to disk, only the latest fields and the probes are kept in memory
+historyM = SnapshotWriter("metalHistory.npy", nY, nX, snapshotCadence, probes=centerProbe, dtype=precision, resume=resume)
+historyP = SnapshotWriter("paraffinHistory.npy", nY, nX, snapshotCadence, probes=centerProbe, dtype=precision, resume=resume)
+if not resume:
+    historyM.record(0, 0.0, thetaPrevM)
+    historyP.record(0, 0.0, thetaPrevP)
+
+# step doubling needs solves much tighter than the error it estimates, so adaptive runs tighten the tolerance
+solverTolerance = min(tolerance, AdaptiveStepper.solverTolRatio*errorTolerance) if adaptive else tolerance
+
+# the solvers are built once and stepped in time, keeping their buffers and factored coefficients
+tM = TDMA2DUnsteady(nX, nY, width, height, thetaPrevM, timeStep, gammaM, solverTolerance, maxIter, thetaBcLeft, thetaBcRight, thetaBcTop, thetaBcBottom, sCM, thetaPrevP, -sPM, profiler=profiler, dtype=precision)
+tP = TDMA2DUnsteady(nX, nY, width, height, thetaPrevP, timeStep, gammaP, solverTolerance, maxIter, thetaBcLeft, thetaBcRight, thetaBcTop, thetaBcBottom, sCP, thetaPrevM, -sPP, profiler=profiler, dtype=precision)
+coupled = CoupledTDMA2DUnsteady(tM, tP, method=coupledMethod) if couplingMode == 'monolithic' else None
+
+def advanceBoth(dt=None):
+    # one timestep of both materials in the chosen coupling mode
+    if coupled is not None:
+        # both materials are advanced at once with the interface exchange treated implicitly
+        return coupled.advance(dt)
+    # first advance the metal using the paraffin temperature from the previous time step
+    thetaM = tM.advance(dt, sourceField=tP.TOld)
+
+    # at this point in time step, we have complete metal temperature distribution
+    # now advance the paraffin using data from metal solver
+    thetaP = tP.advance(dt, sourceField=tM.T)
+    return thetaM, thetaP
+
+stepper = AdaptiveStepper([tM, tP], advanceBoth, timeStep, errorTolerance, dtMax=maxTimeStep, levels=timeStepLevels) if adaptive else None
+detector = SteadyStateDetector([tM, tP]) if steadyShortcut is not None else None
+
+def runState():
+    # everything the time loop carries from one step to the next
+    return {"t": t, "step": step, "wallTime": time.time() - time_start, "metal": tM.getState(), "paraffin": tP.getState(),
+            "stepper": stepper.getState() if stepper is not None else None,
+            "detector": detector.getState() if detector is not None else None,
+            "historyM": historyM.getState(), "historyP": historyP.getState()}
 
 time_start = time.time()
 t = 0.0 # initial time
 step = 0
+if resume:
+    state = loadCheckpoint(checkpointFile)
+    t, step = state["t"], state["step"]
+    time_start -= state["wallTime"]
+    tM.setState(state["metal"])
+    tP.setState(state["paraffin"])
+    if stepper is not None and "stepper" in state:
+        stepper.setState(state["stepper"])
+    elif stepper is not None:
+        # the checkpoint was written with fixed steps, the stepper starts from the initial step at the restored time
+        stepper.time = tM.time
+    if detector is not None and "detector" in state:
+        detector.setState(state["detector"])
+    historyM.setState(state["historyM"])
+    historyP.setState(state["historyP"])
+    thetaM, thetaP = tM.T, tP.T
+    print(f"Resuming from {checkpointFile} at step {step}, time {t:.4f}")
+lastCheckpoint = time.time()
 # need to begin with outer time loop
 while t < maxTime:
-    t += timeStep
+    with profiler.phase('timeStep'):
+        if stepper is not None:
+            stepper.dt = min(stepper.dt, maxTime - t)
+            dt = stepper.step()
+            thetaM, thetaP = tM.T, tP.T
+        else:
+            dt = timeStep
+            thetaM, thetaP = advanceBoth()
+    t += dt
     step += 1
-    print(f"Step : {step}, Time : {t:.4f}")
-    # first call the metal solver, initialized with initial conditions and assumed paraffin temp distribution
-    tM = TDMA2DUnsteady(nX, nY, width, height, thetaPrevM, timeStep, gammaM, tolerance, maxIter, thetaBcLeft, thetaBcRight, thetaBcTop, thetaBcBottom, sCM, thetaPrevP, -sPM)
-    # Solve using the solve method
-    thetaM[:,:,step] = tM.solve()
-
-    # at this point in time step, we have complete metal temperature distribution
-    # now call paraffin solver using data from metal solver
-    tP = TDMA2DUnsteady(nX, nY, width, height, thetaPrevP, timeStep, gammaP, tolerance, maxIter, thetaBcLeft, thetaBcRight, thetaBcTop, thetaBcBottom, sCP, thetaM[:,:,step], -sPP)
-    thetaP[:,:,step] = tP.solve()
+    print(f"Step : {step}, Time : {t:.4f}, dt : {dt:.4g}")
+    with profiler.phase('snapshots'):
+        historyM.record(step, t, thetaM)
+        historyP.record(step, t, thetaP)
 
     # now we have a solution for both metal and paraffin at this time step
-    # check for steady state convergences
-    if np.max(np.abs(thetaP[:,:,step] - thetaPrevP)) < steadyStateTolerance and np.max(np.abs(thetaM[:,:,step] - thetaPrevM)) < steadyStateTolerance:
+    # check for steady state convergences, the change is scaled to the base timestep so adaptive steps compare alike
+    if max(tP.stepChange, tM.stepChange)*timeStep/dt < steadyStateTolerance:
         print(f"Steady state reached at time {t}")
         break
+    if detector is not None and detector.update(dt, stepper.substeps if stepper is not None else 1):
+        with profiler.phase('steadyShortcut'):
+            if steadyShortcut == 'extrapolate':
+                thetaM, thetaP = detector.extrapolate()
+            else:
+                thetaM, thetaP = CoupledTDMA2DUnsteady(tM, tP, method='direct').solveSteady()
+        print(f"Exponential decay (rate {detector.decayRate:.4g}) detected at time {t}, steady state found by {steadyShortcut}")
+        break
 
-    # append the BCs the solution for plotting
-    thetaNumericalM[0,:,step] = thetaBcBottom
-    thetaNumericalM[-1,:,step] = thetaBcTop
-    thetaNumericalM[:,0,step] = thetaBcLeft
-    thetaNumericalM[:,-1,step] = thetaBcRight
-    thetaNumericalM[1:-1,1:-1,step] = thetaM[:,:,step]
-
-    thetaNumericalP[0,:,step] = thetaBcBottom
-    thetaNumericalP[-1,:,step] = thetaBcTop
-    thetaNumericalP[:,0,step] = thetaBcLeft
-    thetaNumericalP[:,-1,step] = thetaBcRight
-    thetaNumericalP[1:-1,1:-1,step] = thetaP[:,:,step]
-
-    # update the previous time step solution
-    thetaPrevM = thetaM[:,:,step]
-    thetaPrevP = thetaP[:,:,step]
+    # the snapshot files are flushed with the checkpoint, so it always matches what they hold
+    if checkpointFile is not None and time.time() - lastCheckpoint > checkpointInterval:
+        with profiler.phase('checkpoint'):
+            historyM.flush()
+            historyP.flush()
+            saveCheckpoint(checkpointFile, runState())
+        lastCheckpoint = time.time()
 
 time_end = time.time()
 print("Computation time to converge: ", time_end - time_start)
+if stepper is not None:
+    print(f"Accepted steps : {stepper.accepted}, rejected steps : {stepper.rejected}")
+    np.savez("timeStepLog.npz", **{key: np.array([entry[key] for entry in stepper.log]) for key in ("time", "dt", "error", "accepted")})
+with profiler.phase('snapshots'):
+    historyM.close()
+    historyP.close()
+# the run is complete, a rerun starts over
+if checkpointFile is not None and os.path.exists(checkpointFile):
+    os.remove(checkpointFile)
+
+# append the wall temperatures of the BCs to the final solutions for plotting
+with profiler.phase('padding'):
+    thetaNumericalM = tM.paddedSolution(thetaM)
+    thetaNumericalP = tP.paddedSolution(thetaP)
+
+# the plots wait for their windows to close, so the profile is reported before them
+print(profiler.report())
+profiler.export(profileFile)
 
 # plot the non-dimensional steady state temperature distribution contour for metal
 plt.figure(1)
 X = np.linspace(0, width, nX+2)
 Y = np.linspace(0, height, nY+2)
 X, Y = np.meshgrid(X, Y)
-plt.contourf(X, Y, thetaNumericalM[:,:,step-1], levels=50, cmap='plasma')
+plt.contourf(X, Y, thetaNumericalM, levels=50, cmap='plasma')
 plt.colorbar(label = "Non-Dimensional Temperature ($\\theta$)")
 plt.title("Non-Dimensional Metal Temperature Distribution")
 plt.xlabel("x/D")
@@ -105,7 +207,7 @@ plt.figure(2)
 X = np.linspace(0, width, nX+2)
 Y = np.linspace(0, height, nY+2)
 X, Y = np.meshgrid(X, Y)
-plt.contourf(X, Y, thetaNumericalP[:,:,step-1], levels=50, cmap='plasma')
+plt.contourf(X, Y, thetaNumericalP, levels=50, cmap='plasma')
 plt.colorbar(label = "Non-Dimensional Temperature ($\\theta$)")
 plt.title("Non-Dimensional Paraffin Temperature Distribution")
 plt.xlabel("x/D")
@@ -113,18 +215,18 @@ plt.ylabel("y/D")
 plt.show()
 
 # plot for centerpoint temperature over time
-thetaCenterM = thetaNumericalM[nY//2,nX//2,:]
+timeCenterM, thetaCenterM = historyM.probe("center")
 plt.figure(3)
-plt.plot(np.linspace(0,t,step), thetaCenterM[:step])
+plt.plot(timeCenterM, thetaCenterM)
 plt.title("Centerpoint Metal Non-Dimensional Temperature")
 plt.xlabel("Non-Dimensional Time ($\\tau$)")
 plt.ylabel("Non-Dimensional Temperature ($\\theta$)")
 plt.show()
 
 # plot for centerpoint temperature over time
-thetaCenterP = thetaNumericalP[nY//2,nX//2,:]
+timeCenterP, thetaCenterP = historyP.probe("center")
 plt.figure(4)
-plt.plot(np.linspace(0,t,step), thetaCenterP[:step])
+plt.plot(timeCenterP, thetaCenterP)
 plt.title("Centerpoint Paraffin Non-Dimensional Temperature")
 plt.xlabel("Non-Dimensional Time ($\\tau$)")
 plt.ylabel("Non-Dimensional Temperature ($\\theta$)")
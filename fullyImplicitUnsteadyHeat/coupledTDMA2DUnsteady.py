@@ -0,0 +1,258 @@
+# CoupledTDMA2DUnsteady advances two coupled TDMA2DUnsteady fields (metal foam and paraffin) together,
+# treating the interface exchange implicitly instead of lagging one field behind the other.
+# Every cell holds a pair of unknowns, so the line solves become 2x2 block tridiagonal systems that are
+# swept in the same zebra line by line structure as TDMA2D. The block system can instead be solved directly
+# as one sparse matrix (scipy needed), factored once per time step size. The factors of the last few step
+# sizes are kept, so an adaptive stepper going back and forth between step sizes (e.g. dt and dt/2 of step
+# doubling, on the ladder of AdaptiveStepper levels) solves large steps directly without refactoring.
+# solveSteady drops the transient terms and solves straight for the steady coupled fields.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import os
+import sys
+import numpy as np
+import time
+from contextlib import nullcontext
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'thomasAlgorithm'))
+from tdmaSolver import blockTdmaFactorBatch, blockTdmaSubstituteBatch
+
+class CoupledTDMA2DUnsteady:
+
+    methods = ('sweeps', 'direct')
+
+    def __init__(self, first, second, method='sweeps', tol=None, maxIter=None, profiler=None, maxFactors=8):
+        """
+        Parameters:
+        first, second (TDMA2DUnsteady): solvers on the same grid, the sC source of each is the other field
+        method (str): 'sweeps' (block line iteration) or 'direct' (sparse LU of the block system)
+        tol (float): largest change between iterates of either field at convergence, defaults to first.tol
+        maxIter (int): maximum number of iterations per time step, defaults to first.maxIter
+        profiler (SolverProfiler): collects phase timings and counters, defaults to the profiler of first
+        maxFactors (int): number of time step sizes whose sparse factors the direct method keeps
+        """
+        if (first.nX, first.nY) != (second.nX, second.nY):
+            raise ValueError("both fields must be on the same grid")
+        if method not in self.methods:
+            raise ValueError("method must be one of %s" % (self.methods,))
+        if first.dtype != second.dtype:
+            raise ValueError("both fields must use the same dtype")
+        if any(field.periodicX or field.periodicY for field in (first, second)):
+            # the block line solves have no cyclic form
+            raise ValueError("periodic boundaries are not supported by the coupled solver, use the staggered one")
+        self.fields = (first, second)
+        self.method = method
+        self.tol = tol if tol is not None else first.tol
+        self.maxIter = maxIter if maxIter is not None else first.maxIter
+        self.profiler = profiler if profiler is not None else first.profiler
+        self.nX = nX = first.nX
+        self.nY = nY = first.nY
+        self.history = []
+        self.iterations = 0
+        self.maxFactors = maxFactors
+        self.sparseFactors = {} # sparse factor of each recent time step size, oldest first
+
+        # both fields share one padded array, the last axis holds the field
+        # in the precision of the fields, the block factors are computed in double and stored in it
+        self.dtype = first.dtype
+        self.TPad = np.zeros((nY+2, nX+2, 2), dtype=self.dtype)
+        self.T = self.TPad[1:-1,1:-1]
+        self.T_prev = np.zeros((nY, nX, 2), dtype=self.dtype)
+        self.rhs = np.zeros((nY, nX, 2), dtype=self.dtype) # b + ap0*TOld of each field, constant within a time step
+        self.work = np.zeros((nY, nX, 2), dtype=self.dtype)
+        # the longer lines are solved first, as in TDMA2D
+        if nX > nY:
+            self.sweepOrder = (self.verticalSweep, self.horizontalSweep)
+        else:
+            self.sweepOrder = (self.horizontalSweep, self.verticalSweep)
+        self.factorize()
+
+    def phase(self, name):
+        # timing context of the profiler, does nothing without one
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def assembleCoefficients(self, steady=False):
+        # stacks the stencils of both fields. The diagonal block of a cell holds each field's aP and the
+        # interface exchange -sC*dV that the staggered solve put on the right hand side.
+        # The steady stencil leaves out the ap0 of the time step.
+        first, second = self.fields
+        dV = first.deltaX * first.deltaY
+        aP = np.zeros((self.nY, self.nX, 2, 2), dtype=self.dtype)
+        aP[...,0,0] = first.aP - first.ap0*steady
+        aP[...,0,1] = -first.sC*dV
+        aP[...,1,0] = -second.sC*dV
+        aP[...,1,1] = second.aP - second.ap0*steady
+        aN, aS, aE, aW = (np.stack((getattr(first, name), getattr(second, name)), axis=-1) for name in ('aN', 'aS', 'aE', 'aW'))
+        return aP, aN, aS, aE, aW
+
+    def factorize(self, steady=False, reuse=False):
+        # block Thomas factors of the even and odd lines in both directions (zebra ordering), or the sparse
+        # factor of the direct method. reuse keeps the sparse factors of earlier time step sizes, which is only
+        # valid when nothing but the time step changed since they were computed.
+        # the steady factors have no time step, so the next advance refactors
+        self.tau = None if steady else self.fields[0].tau
+        if not reuse:
+            self.sparseFactors.clear()
+        with self.phase('assembly'):
+            self.aP, self.aN, self.aS, self.aE, self.aW = self.assembleCoefficients(steady)
+        if self.method == 'direct':
+            self.sparseFactor = self.sparseFactors.pop(self.tau, None)
+            if self.sparseFactor is not None:
+                # most recently used goes last
+                self.sparseFactors[self.tau] = self.sparseFactor
+            return
+        with self.phase('factorize'):
+            self.sparseFactor = None
+            self.rowBatches = []
+            for rows in (slice(0, None, 2), slice(1, None, 2)):
+                north = slice(rows.start + 2, None, 2)
+                south = slice(rows.start, -2, 2)
+                P, pivots = (f.astype(self.dtype, copy=False) for f in blockTdmaFactorBatch(self.aP[rows], self.aE[rows], self.aW[rows]))
+                # right hand side and work buffers of the batch, so the sweeps allocate nothing
+                d = np.zeros(self.T[rows].shape, dtype=self.dtype)
+                self.rowBatches.append((rows, north, south, P, pivots, d, np.zeros_like(d)))
+            self.columnBatches = []
+            for cols in (slice(0, None, 2), slice(1, None, 2)):
+                east = slice(cols.start + 2, None, 2)
+                west = slice(cols.start, -2, 2)
+                P, pivots = (f.astype(self.dtype, copy=False) for f in blockTdmaFactorBatch(self.aP[:,cols].swapaxes(0, 1), self.aN[:,cols].swapaxes(0, 1), self.aS[:,cols].swapaxes(0, 1)))
+                d = np.zeros(self.T[:,cols].shape, dtype=self.dtype)
+                self.columnBatches.append((cols, east, west, P, pivots, d, np.zeros_like(d)))
+
+    def horizontalSweep(self):
+        # solves the vertical lines (constant i), even lines then odd lines
+        TPad = self.TPad
+        for cols, east, west, P, pivots, d, work in self.columnBatches:
+            np.multiply(self.aE[:,cols], TPad[1:-1,east], out=d)
+            np.multiply(self.aW[:,cols], TPad[1:-1,west], out=work)
+            d += work
+            d += self.rhs[:,cols]
+            blockTdmaSubstituteBatch(P, pivots, self.aS[:,cols].swapaxes(0, 1), d.swapaxes(0, 1), out=self.T[:,cols].swapaxes(0, 1))
+
+    def verticalSweep(self):
+        # solves the horizontal lines (constant j), even lines then odd lines
+        TPad = self.TPad
+        for rows, north, south, P, pivots, d, work in self.rowBatches:
+            np.multiply(self.aN[rows], TPad[north,1:-1], out=d)
+            np.multiply(self.aS[rows], TPad[south,1:-1], out=work)
+            d += work
+            d += self.rhs[rows]
+            blockTdmaSubstituteBatch(P, pivots, self.aW[rows], d, out=self.T[rows])
+
+    def maxChange(self):
+        work = self.work
+        np.subtract(self.T, self.T_prev, out=work)
+        np.abs(work, out=work)
+        return work.max()
+
+    def assembleMatrix(self):
+        # block sparse matrix of both fields, [[A1, -c1*I], [-c2*I, A2]] over the unknowns of both grids
+        # the field matrices carry their own aP, which is swapped for the block diagonal in use
+        import scipy.sparse as sparse
+        first, second = self.fields
+        A1 = first.assembleMatrix() + sparse.diags(self.aP[...,0,0].ravel() - first.aP.ravel())
+        A2 = second.assembleMatrix() + sparse.diags(self.aP[...,1,1].ravel() - second.aP.ravel())
+        return sparse.bmat([[A1, sparse.diags(self.aP[...,0,1].ravel())],
+                            [sparse.diags(self.aP[...,1,0].ravel()), A2]], format='csc')
+
+    def solve(self):
+        # solves the coupled time step starting from the current T
+        start = time.perf_counter()
+        if self.method == 'direct':
+            if self.sparseFactor is None:
+                import scipy.sparse.linalg as sparseLinalg
+                with self.phase('sparseFactor'):
+                    self.sparseFactor = sparseLinalg.splu(self.assembleMatrix())
+                if self.tau is not None:
+                    self.sparseFactors[self.tau] = self.sparseFactor
+                    if len(self.sparseFactors) > self.maxFactors:
+                        del self.sparseFactors[list(self.sparseFactors)[0]]
+            with self.phase('sparseSolve'):
+                rhs = np.concatenate((self.rhs[...,0].ravel(), self.rhs[...,1].ravel()))
+                x = self.sparseFactor.solve(rhs).reshape(2, self.nY, self.nX)
+                self.T[:,:] = np.moveaxis(x, 0, -1)
+            self.iterations = 1
+            self.history = [{"iteration": 1, "update": None, "time": time.perf_counter() - start}]
+            if self.profiler is not None:
+                self.profiler.iteration(self, self.history[-1])
+            return self.T
+
+        self.history = []
+        profiler = self.profiler
+        linesPerIteration = self.nX + self.nY # block lines, each solving both fields
+        for iter in range(1, self.maxIter+1):
+            with self.phase('copy'):
+                np.copyto(self.T_prev, self.T)
+            with self.phase('sweeps'):
+                for sweep in self.sweepOrder:
+                    sweep()
+            with self.phase('convergence'):
+                update = self.maxChange()
+            self.history.append({"iteration": iter, "update": float(update), "time": time.perf_counter() - start})
+            self.iterations = iter
+            if profiler is not None:
+                profiler.count('linesSolved', linesPerIteration)
+                profiler.iteration(self, self.history[-1])
+            if update < self.tol:
+                break
+        return self.T
+
+    def advance(self, dt=None):
+        # solves one coupled time step from the TOld of both fields and makes the result their new TOld
+        first, second = self.fields
+        if dt is not None:
+            first.setTimeStep(dt)
+            second.setTimeStep(dt)
+        # the block factors replace the line factors of the fields, so only their stencils are brought up to date
+        for field in self.fields:
+            field.updateTimeStep(factorize=False)
+        # gamma(T) of the fields is lagged by one time step, they rebuild their stencils once T has moved far enough
+        refreshed = [field.updateProperties() for field in self.fields]
+        if first.tau != self.tau or any(refreshed):
+            self.factorize(reuse=not any(refreshed))
+        with self.phase('rightHandSide'):
+            for k, field in enumerate(self.fields):
+                np.multiply(field.TOld, field.ap0, out=self.rhs[...,k])
+                self.rhs[...,k] += field.b
+                self.T[...,k] = field.TOld
+        self.solve()
+
+        with self.phase('stepUpdate'):
+            for k, field in enumerate(self.fields):
+                np.copyto(field.T, self.T[...,k])
+                np.copyto(field.T_prev, field.T)
+                np.subtract(field.T, field.TOld, out=field.work)
+                np.abs(field.work, out=field.work)
+                field.stepChange = field.work.max()
+                np.copyto(field.TOld, field.T)
+                field.time += field.tau
+                field.stepCount += 1
+            # the staggered source terms stay consistent, so either solver can carry on alone
+            np.copyto(first.coupledPrev, second.T)
+            np.copyto(second.coupledPrev, first.T)
+        if self.profiler is not None:
+            self.profiler.step(self)
+        return first.T, second.T
+
+    def solveSteady(self):
+        # solves for the steady coupled fields from the boundary conditions alone, starting from TOld, and
+        # makes them the TOld of both fields. Time and step count are left as they are.
+        for field in self.fields:
+            field.updateTimeStep(factorize=False)
+        self.factorize(steady=True)
+        for k, field in enumerate(self.fields):
+            self.rhs[...,k] = field.b
+            self.T[...,k] = field.TOld
+        self.solve()
+
+        for k, field in enumerate(self.fields):
+            np.copyto(field.T, self.T[...,k])
+            np.copyto(field.T_prev, field.T)
+            np.subtract(field.T, field.TOld, out=field.work)
+            np.abs(field.work, out=field.work)
+            field.stepChange = field.work.max()
+            np.copyto(field.TOld, field.T)
+        first, second = self.fields
+        np.copyto(first.coupledPrev, second.T)
+        np.copyto(second.coupledPrev, first.T)
+        return first.T, second.T
@@ -0,0 +1,311 @@
+# parameterSweep runs the coupled metal foam / paraffin transient of coupledNonDimensional2D for many cases.
+# A case is a dict of the driver parameters (H, epsilon, kRatio, gammaP, timeStep, grid, ...), anything left out
+# takes the value of caseDefaults. runSweep fans the cases out over a process pool. Every worker keeps the
+# solvers of its last grid and restarts them for the next case, so consecutive cases reuse the buffers.
+# The results (final fields, probe histories, timings) are collected by the parent process into a ResultsStore:
+# one .npz file per case plus an index.json keyed by a hash of the case. Cases already in the store are skipped,
+# so an interrupted sweep resumes where it stopped when it is run again.
+# usage: python parameterSweep.py --store sweepResults --H 0 10 100 --epsilon 0.8 0.9 [--workers 4]
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'thomasAlgorithm'))
+from TDMA2DUnsteady import TDMA2DUnsteady
+from coupledTDMA2DUnsteady import CoupledTDMA2DUnsteady
+from adaptiveStepper import AdaptiveStepper
+from steadyStateDetector import SteadyStateDetector
+from solverProfiler import SolverProfiler
+
+# parameters of a case and their defaults, the same as the constants of coupledNonDimensional2D
+caseDefaults = {
+    "H": 0.0, # interface parameter
+    "epsilon": 0.8, # porosity
+    "kRatio": 100.0, # kM/kP, thermal conductivity ratio
+    "gammaM": 1.0, # non-dimensional thermal constant of metal foam
+    "gammaP": 1.0/100.0, # alphaP / alphaM
+    "thetaBcLeft": 0.0,
+    "thetaBcRight": 1.0,
+    "thetaBcTop": 0.0,
+    "thetaBcBottom": 1.0,
+    "width": 1.0,
+    "height": 1.0,
+    "nX": 50,
+    "nY": 50,
+    "maxIter": 1000,
+    "tolerance": 1e-3, # convergence tolerance of the solution at each timestep
+    "timeStep": 0.01, # the initial one when adaptive
+    "adaptive": False,
+    "errorTolerance": 1e-3,
+    "maxTimeStep": 10.0,
+    "timeStepLevels": 2, # adaptive timesteps per doubling, see AdaptiveStepper
+    "steadyStateTolerance": 1e-6,
+    "maxTime": 100.0,
+    "steadyShortcut": None, # 'extrapolate', 'direct' or None
+    "couplingMode": 'monolithic', # or 'staggered'
+    "precision": 'float64',
+    "probes": None, # {name: [j, i]} of points recorded at every step, None records the center
+}
+
+# parameters that fix the solver objects, cases that share them can reuse the solvers of a worker
+solverParameters = ("nX", "nY", "width", "height", "thetaBcLeft", "thetaBcRight", "thetaBcTop", "thetaBcBottom",
+                    "maxIter", "tolerance", "couplingMode", "precision")
+
+# solvers of the last case run in this process, the cache of each worker
+workerSolvers = {}
+
+def completeCase(case):
+    # the case with every parameter filled in, numbers converted to the type of their default
+    unknown = set(case) - set(caseDefaults)
+    if unknown:
+        raise ValueError("unknown case parameters: %s" % ", ".join(sorted(unknown)))
+    full = dict(caseDefaults)
+    for name, value in case.items():
+        default = caseDefaults[name]
+        if isinstance(default, float) and not isinstance(value, bool):
+            value = float(value)
+        elif isinstance(default, int) and not isinstance(default, bool):
+            value = int(value)
+        full[name] = value
+    return full
+
+def caseKey(case):
+    # stable identifier of a case, the hash of its complete parameters
+    text = json.dumps(completeCase(case), sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+def caseGrid(**values):
+    """
+    Cases of every combination of the given values, e.g. caseGrid(H=[0, 10, 100], epsilon=[0.8, 0.9], nX=30).
+
+    Parameters:
+    values: case parameters, given as a list of values to sweep or a single value shared by every case
+    """
+    names = list(values)
+    lists = [value if isinstance(value, (list, tuple, np.ndarray)) else [value] for value in values.values()]
+    return [dict(zip(names, combination)) for combination in itertools.product(*lists)]
+
+def solverTolerance(case):
+    # the step doubling estimate of an adaptive case needs the iterations converged well below errorTolerance
+    if case["adaptive"]:
+        return min(case["tolerance"], AdaptiveStepper.solverTolRatio*case["errorTolerance"])
+    return case["tolerance"]
+
+def caseSolvers(case):
+    # solvers of the case, restarted from the ones this worker built for the previous case when they are compatible
+    tolerance = solverTolerance(case)
+    # adaptive cases solve their large steps with the sparse LU of the monolithic system, as the driver does
+    method = 'direct' if case["adaptive"] else 'sweeps'
+    key = tuple(case[name] for name in solverParameters) + (tolerance, method)
+    nX, nY = case["nX"], case["nY"]
+    sCM = case["H"]/(1 - case["epsilon"])
+    sCP = case["H"]*case["kRatio"]*case["gammaP"]/case["epsilon"]
+    zero = np.zeros((nY, nX))
+    if key in workerSolvers:
+        tM, tP, coupled = workerSolvers[key]
+        tM.restart(zero, zero, case["timeStep"], case["gammaM"], sCM, -sCM)
+        tP.restart(zero, zero, case["timeStep"], case["gammaP"], sCP, -sCP)
+        if coupled is not None:
+            coupled.factorize()
+        return tM, tP, coupled
+    workerSolvers.clear()
+    boundaries = (case["thetaBcLeft"], case["thetaBcRight"], case["thetaBcTop"], case["thetaBcBottom"])
+    tM = TDMA2DUnsteady(nX, nY, case["width"], case["height"], zero, case["timeStep"], case["gammaM"], tolerance, case["maxIter"], *boundaries, sCM, zero, -sCM, dtype=case["precision"])
+    tP = TDMA2DUnsteady(nX, nY, case["width"], case["height"], zero, case["timeStep"], case["gammaP"], tolerance, case["maxIter"], *boundaries, sCP, zero, -sCP, dtype=case["precision"])
+    coupled = CoupledTDMA2DUnsteady(tM, tP, method=method) if case["couplingMode"] == 'monolithic' else None
+    workerSolvers[key] = (tM, tP, coupled)
+    return tM, tP, coupled
+
+def runCase(case):
+    """
+    Runs one case from theta = 0 until steady state or maxTime, as coupledNonDimensional2D does.
+
+    Parameters:
+    case (dict): case parameters, see caseDefaults
+
+    Returns:
+    result (dict): arrays (final fields thetaM and thetaP, probe times and values) and the summary of the run
+    """
+    case = completeCase(case)
+    start = time.perf_counter()
+    tM, tP, coupled = caseSolvers(case)
+    setupTime = time.perf_counter() - start
+    profiler = SolverProfiler()
+    for solver in (tM, tP, coupled):
+        if solver is not None:
+            solver.profiler = profiler
+
+    def advanceBoth(dt=None):
+        if coupled is not None:
+            return coupled.advance(dt)
+        thetaM = tM.advance(dt, sourceField=tP.TOld)
+        thetaP = tP.advance(dt, sourceField=tM.T)
+        return thetaM, thetaP
+
+    timeStep = case["timeStep"]
+    maxTime = case["maxTime"]
+    stepper = AdaptiveStepper([tM, tP], advanceBoth, timeStep, case["errorTolerance"], dtMax=case["maxTimeStep"], levels=case["timeStepLevels"]) if case["adaptive"] else None
+    detector = SteadyStateDetector([tM, tP]) if case["steadyShortcut"] is not None else None
+    probes = case["probes"] if case["probes"] is not None else {"center": (case["nY"]//2, case["nX"]//2)}
+    probeTime = [0.0]
+    probeM = {name: [float(tM.T[j,i])] for name, (j, i) in probes.items()}
+    probeP = {name: [float(tP.T[j,i])] for name, (j, i) in probes.items()}
+
+    t = 0.0
+    step = 0
+    steady = False
+    thetaM, thetaP = tM.T, tP.T
+    while t < maxTime:
+        with profiler.phase('timeStep'):
+            if stepper is not None:
+                stepper.dt = min(stepper.dt, maxTime - t)
+                dt = stepper.step()
+                thetaM, thetaP = tM.T, tP.T
+            else:
+                dt = timeStep
+                thetaM, thetaP = advanceBoth()
+        t += dt
+        step += 1
+        probeTime.append(t)
+        for name, (j, i) in probes.items():
+            probeM[name].append(float(thetaM[j,i]))
+            probeP[name].append(float(thetaP[j,i]))
+
+        if max(tP.stepChange, tM.stepChange)*timeStep/dt < case["steadyStateTolerance"]:
+            steady = True
+            break
+        if detector is not None and detector.update(dt, stepper.substeps if stepper is not None else 1):
+            with profiler.phase('steadyShortcut'):
+                if case["steadyShortcut"] == 'extrapolate':
+                    thetaM, thetaP = detector.extrapolate()
+                else:
+                    thetaM, thetaP = CoupledTDMA2DUnsteady(tM, tP, method='direct').solveSteady()
+            steady = True
+            break
+
+    arrays = {"thetaM": np.array(thetaM), "thetaP": np.array(thetaP), "probeTime": np.array(probeTime)}
+    for name in probes:
+        arrays["probeM_" + name] = np.array(probeM[name])
+        arrays["probeP_" + name] = np.array(probeP[name])
+    summary = {"steps": step, "finalTime": t, "steady": steady, "setupTime": setupTime,
+               "runTime": time.perf_counter() - start, "profile": profiler.summary()}
+    if stepper is not None:
+        summary["accepted"] = stepper.accepted
+        summary["rejected"] = stepper.rejected
+    return {"arrays": arrays, "summary": summary}
+
+
+class ResultsStore:
+    # directory of case results: <key>.npz with the arrays of every case and index.json with their parameters and
+    # summaries. Files are written to a temporary name and renamed, so an interrupted write never leaves a partial
+    # entry behind, and a case only counts as present once both its arrays and its index entry are written.
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.indexPath = os.path.join(directory, "index.json")
+        self.index = {}
+        if os.path.exists(self.indexPath):
+            with open(self.indexPath) as file:
+                self.index = json.load(file)
+
+    def __contains__(self, key):
+        return key in self.index and os.path.exists(os.path.join(self.directory, self.index[key]["file"]))
+
+    def __len__(self):
+        return len(self.index)
+
+    def save(self, key, case, result):
+        # writes the arrays of one case, then its index entry
+        name = key + ".npz"
+        temporary = os.path.join(self.directory, key + ".tmp.npz")
+        np.savez(temporary, **result["arrays"])
+        os.replace(temporary, os.path.join(self.directory, name))
+        self.index[key] = {"case": completeCase(case), "summary": result["summary"], "file": name}
+        with open(self.indexPath + ".tmp", 'w') as file:
+            json.dump(self.index, file, indent=1)
+        os.replace(self.indexPath + ".tmp", self.indexPath)
+
+    def load(self, key):
+        # arrays of a case as a dict
+        with np.load(os.path.join(self.directory, self.index[key]["file"])) as data:
+            return dict(data)
+
+    def find(self, **values):
+        # keys of the stored cases whose parameters match all the given values
+        return [key for key, entry in self.index.items() if all(entry["case"][name] == value for name, value in completeCase(values).items() if name in values)]
+
+
+def runSweep(cases, store, nWorkers=None, verbose=True):
+    """
+    Runs every case that is not in the store yet and saves its result there as soon as it finishes.
+
+    Parameters:
+    cases (list): case dicts, see caseDefaults and caseGrid
+    store (ResultsStore or str): results store, or the directory of one
+    nWorkers (int): number of worker processes, defaults to the number of CPUs; 1 runs the cases in this process
+    verbose (bool): print a line per finished case
+
+    Returns:
+    keys (list): store key of every case, in the order of cases
+    """
+    if not isinstance(store, ResultsStore):
+        store = ResultsStore(store)
+    cases = [completeCase(case) for case in cases]
+    keys = [caseKey(case) for case in cases]
+    pending = {}
+    for key, case in zip(keys, cases):
+        if key not in store:
+            pending[key] = case
+    if verbose:
+        print("%d cases, %d already in %s" % (len(cases), len(cases) - len(pending), store.directory))
+
+    def finished(key, result):
+        store.save(key, pending[key], result)
+        if verbose:
+            summary = result["summary"]
+            print("case %s done: %d steps to time %.4g in %.3g s%s" % (key, summary["steps"], summary["finalTime"],
+                  summary["runTime"], ", steady" if summary["steady"] else ""))
+
+    nWorkers = nWorkers if nWorkers is not None else os.cpu_count()
+    if nWorkers == 1:
+        for key, case in pending.items():
+            finished(key, runCase(case))
+        return keys
+    # cases on the same grid are submitted together, so a worker tends to get cases its solvers can be restarted for
+    order = sorted(pending, key=lambda key: tuple(str(pending[key][name]) for name in solverParameters))
+    with ProcessPoolExecutor(nWorkers) as pool:
+        futures = {pool.submit(runCase, pending[key]): key for key in order}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                # a failed case stays out of the store, so the next run retries it
+                print("case %s failed: %r" % (key, error))
+                continue
+            finished(key, result)
+    return keys
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Parameter sweep of the coupled metal foam / paraffin transient")
+    parser.add_argument('--store', default='sweepResults', help="directory of the results store")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    for name in ("H", "epsilon", "kRatio", "gammaP", "timeStep"):
+        parser.add_argument('--' + name, type=float, nargs='+', default=[caseDefaults[name]], help="values of %s to sweep" % name)
+    parser.add_argument('--nX', type=int, default=caseDefaults["nX"])
+    parser.add_argument('--nY', type=int, default=caseDefaults["nY"])
+    parser.add_argument('--maxTime', type=float, default=caseDefaults["maxTime"])
+    args = parser.parse_args()
+
+    cases = caseGrid(H=args.H, epsilon=args.epsilon, kRatio=args.kRatio, gammaP=args.gammaP, timeStep=args.timeStep,
+                     nX=args.nX, nY=args.nY, maxTime=args.maxTime)
+    runSweep(cases, args.store, args.workers)
@@ -0,0 +1,114 @@
+# snapshotWriter streams the time history of a 2D field to disk instead of holding every time step in memory.
+# Selected time steps are appended to a .npy file that can be opened later with np.load(path, mmap_mode='r'),
+# a small ring of the most recent fields stays in memory, and point probes record every step.
+# Snapshots can be stored in single precision (dtype='float32'), which halves the file size.
+# getState/setState checkpoint the writer; a writer opened with resume=True keeps the existing file, and setState
+# cuts it back to the snapshots of the checkpoint before new ones are appended.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import os
+import numpy as np
+
+class SnapshotWriter:
+
+    # the .npy header is written with a fixed length so it can be rewritten in place as frames are appended
+    headerLength = 128
+
+    def __init__(self, path, nY, nX, cadence=1, ringSize=2, probes=None, dtype='float64', resume=False):
+        """
+        Parameters:
+        path (str): .npy file the snapshots are appended to, None keeps only the ring and probes
+        nY, nX (int): field size
+        cadence (int): every cadence-th step is written to disk
+        ringSize (int): number of most recent fields kept in memory
+        probes (dict): name -> (j, i) points whose value is recorded at every step
+        dtype (str): precision of the snapshots and the ring, 'float64' or 'float32'
+        resume (bool): open an existing snapshot file for a run restarted from a checkpoint (see setState)
+        """
+        self.path = path
+        self.nY = nY
+        self.nX = nX
+        self.cadence = cadence
+        self.dtype = np.dtype(dtype).newbyteorder('<') # the file is always little endian
+        self.ring = np.zeros((ringSize, nY, nX), dtype=dtype)
+        self.ringCount = 0 # number of fields recorded into the ring so far
+        self.probes = probes if probes is not None else {}
+        self.probeHistory = {name: [] for name in self.probes}
+        self.probeTimes = []
+        self.snapshotSteps = []
+        self.snapshotTimes = []
+        self.file = None
+        if path is not None:
+            # snapshot steps, times and probe histories are saved next to the snapshots when the writer closes
+            self.indexPath = (path[:-len('.npy')] if path.endswith('.npy') else path) + 'Index.npz'
+            if resume and os.path.exists(path):
+                self.file = open(path, 'r+b')
+            else:
+                self.file = open(path, 'wb')
+                self.writeHeader()
+
+    def writeHeader(self):
+        # npy version 1.0 header, padded with spaces to the fixed length
+        header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d, %d, %d), }" % (self.dtype.str, len(self.snapshotSteps), self.nY, self.nX)
+        header = header.ljust(self.headerLength - 10 - 1) + '\n'
+        self.file.write(b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1'))
+
+    def record(self, step, t, field):
+        # stores the field for this step in the ring, samples the probes and writes a snapshot on cadence
+        np.copyto(self.ring[self.ringCount % len(self.ring)], field)
+        self.ringCount += 1
+        self.probeTimes.append(t)
+        for name, (j, i) in self.probes.items():
+            self.probeHistory[name].append(field[j, i])
+        if self.file is not None and step % self.cadence == 0:
+            np.ascontiguousarray(field, dtype=self.dtype).tofile(self.file)
+            self.snapshotSteps.append(step)
+            self.snapshotTimes.append(t)
+
+    def latest(self, k=0):
+        # k-th most recent field held in the ring (0 is the last one recorded)
+        if k >= min(self.ringCount, len(self.ring)):
+            raise IndexError("only %d fields are held in the ring" % min(self.ringCount, len(self.ring)))
+        return self.ring[(self.ringCount - 1 - k) % len(self.ring)]
+
+    def probe(self, name):
+        # times and values recorded for one probe
+        return np.array(self.probeTimes), np.array(self.probeHistory[name])
+
+    def getState(self):
+        # ring, probes and snapshot record for checkpointing, flush first so the file holds every snapshot
+        return {"ring": self.ring.copy(), "ringCount": self.ringCount, "probeTimes": np.array(self.probeTimes),
+                "probeHistory": {name: np.array(values) for name, values in self.probeHistory.items()},
+                "snapshotSteps": np.array(self.snapshotSteps, dtype=int), "snapshotTimes": np.array(self.snapshotTimes)}
+
+    def setState(self, state):
+        # restores a state taken with getState, snapshots written after it are dropped from the file
+        np.copyto(self.ring, state["ring"])
+        self.ringCount = state["ringCount"]
+        self.probeTimes = list(state["probeTimes"])
+        self.probeHistory = {name: list(state["probeHistory"][name]) for name in self.probes}
+        self.snapshotSteps = [int(step) for step in state["snapshotSteps"]]
+        self.snapshotTimes = list(state["snapshotTimes"])
+        if self.file is not None:
+            self.file.truncate(self.headerLength + len(self.snapshotSteps)*self.nY*self.nX*self.dtype.itemsize)
+            self.flush()
+
+    def flush(self):
+        # rewrites the header with the current number of snapshots so the file is readable mid run
+        if self.file is None:
+            return
+        self.file.seek(0)
+        self.writeHeader()
+        self.file.seek(0, 2)
+        self.file.flush()
+
+    def close(self):
+        # finalizes the snapshot file and saves the snapshot times and probe histories next to it
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+        np.savez(self.indexPath, steps=np.array(self.snapshotSteps), times=np.array(self.snapshotTimes), probeTimes=np.array(self.probeTimes),
+                 **{'probe_' + name: np.array(values) for name, values in self.probeHistory.items()})
@@ -0,0 +1,134 @@
+# SteadyStateDetector watches a transient for the asymptotic regime, where a single slowest mode is left
+# and the fields approach the steady state as exp(-lambda*t). The decay rate lambda is estimated from the
+# changes over consecutive time steps, once it settles the steady state can be extrapolated directly.
+# For a fully implicit step dt the slowest mode is multiplied by r = 1/(1 + lambda*dt), which gives
+#   lambda = (dt/(dtOld*q) - 1)/dt      with q = ||dT||/||dTOld|| the ratio of consecutive changes
+#   T_steady = T + dT/(lambda*dt)        the sum of all remaining changes
+# so the estimate also holds when the time step changes between steps. A step made of n implicit substeps
+# (the two half steps an AdaptiveStepper keeps) multiplies the mode by r = (1 + lambda*dt/n)**-n instead;
+# lambda then solves q = rOld*(1 - r)/(1 - rOld) and T_steady = T + dT*r/(1 - r).
+# Faster modes bias the estimate by an amount that decays in time, not in steps, so the rate only counts as
+# settled when its estimates over the last window/lambda of time (window e-folding times) agree. With small
+# steps a window of steps would pass while the next mode is still present and the extrapolation is off.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+
+def stepFactor(rate, dt, substeps=1):
+    # factor by which a step of substeps implicit substeps multiplies a mode decaying at rate
+    return (1.0 + rate*dt/substeps)**-substeps
+
+def decayRate(q, dtOld, dt, substepsOld=1, substeps=1):
+    """
+    Decay rate of the single mode whose changes over two consecutive steps have the ratio q.
+
+    Parameters:
+    q (float): ||dT||/||dTOld||
+    dtOld, dt (float): sizes of the previous and the last step
+    substepsOld, substeps (int): implicit substeps each of them was made of
+
+    Returns:
+    rate (float): lambda, not positive when the changes do not decay
+    """
+    if substepsOld == 1 and substeps == 1:
+        return (dt/(dtOld*q) - 1.0)/dt
+    def ratio(rate):
+        rOld = stepFactor(rate, dtOld, substepsOld)
+        return rOld*(1.0 - stepFactor(rate, dt, substeps))/(1.0 - rOld)
+    # the ratio falls from dt/dtOld at rate 0 towards 0, so the root is bracketed and bisected
+    if q >= dt/dtOld:
+        return 0.0
+    low, high = 0.0, 1.0/dt
+    while ratio(high) > q:
+        low, high = high, 2.0*high
+    for _ in range(100):
+        middle = 0.5*(low + high)
+        if ratio(middle) > q:
+            low = middle
+        else:
+            high = middle
+    return 0.5*(low + high)
+
+class SteadyStateDetector:
+
+    def __init__(self, fields, window=1.0, rateTol=1e-3, minEstimates=3):
+        """
+        Parameters:
+        fields (list): TDMA2DUnsteady solvers that approach the steady state together
+        window (float): time span, in e-folding times 1/lambda, over which the decay rate estimates must agree
+        rateTol (float): relative spread of those estimates below which the transient counts as asymptotic
+        minEstimates (int): fewest estimates the window must hold
+        """
+        self.fields = fields
+        self.window = window
+        self.rateTol = rateTol
+        self.minEstimates = minEstimates
+        self.previous = [field.TOld.copy() for field in fields]
+        self.changes = [np.zeros(field.TOld.shape) for field in fields]
+        self.changeNorm = None
+        self.dt = None
+        self.substeps = 1
+        self.time = 0.0 # time since the detector was created
+        self.rates = [] # decay rate estimated at every step
+        self.times = [] # time of every estimate
+        self.decayRate = None
+
+    def update(self, dt, substeps=1):
+        # records the step just taken with size dt in substeps implicit substeps, returns True once the decay
+        # rate has settled
+        changeNorm = 0.0
+        for field, previous, change in zip(self.fields, self.previous, self.changes):
+            np.subtract(field.TOld, previous, out=change)
+            np.copyto(previous, field.TOld)
+            changeNorm += np.vdot(change, change)
+        changeNorm = np.sqrt(changeNorm)
+        self.time += dt
+
+        if self.changeNorm and changeNorm > 0:
+            q = changeNorm/self.changeNorm
+            self.rates.append(decayRate(q, self.dt, dt, self.substeps, substeps))
+            self.times.append(self.time)
+        self.changeNorm = changeNorm
+        self.dt = dt
+        self.substeps = substeps
+
+        if not self.rates or self.rates[-1] <= 0:
+            return False
+        # the estimates must reach back a whole window
+        start = self.time - self.window/self.rates[-1]
+        if self.times[0] > start:
+            return False
+        recent = [rate for rate, time in zip(self.rates, self.times) if time >= start]
+        if len(recent) < self.minEstimates or min(recent) <= 0:
+            return False
+        self.decayRate = recent[-1]
+        return max(recent) - min(recent) < self.rateTol*self.decayRate
+
+    def getState(self):
+        # detector state for checkpointing
+        return {"previous": np.stack(self.previous), "changes": np.stack(self.changes), "changeNorm": self.changeNorm,
+                "dt": self.dt, "substeps": self.substeps, "time": self.time, "rates": np.array(self.rates), "times": np.array(self.times),
+                "decayRate": self.decayRate}
+
+    def setState(self, state):
+        # restores a state taken with getState, entries missing from a checkpoint were None
+        for previous, change, savedPrevious, savedChange in zip(self.previous, self.changes, state["previous"], state["changes"]):
+            np.copyto(previous, savedPrevious)
+            np.copyto(change, savedChange)
+        self.changeNorm = state.get("changeNorm")
+        self.dt = state.get("dt")
+        self.substeps = state["substeps"]
+        self.time = state["time"]
+        self.rates = list(state["rates"])
+        self.times = list(state["times"])
+        self.decayRate = state.get("decayRate")
+
+    def extrapolate(self):
+        # adds the remaining decay of the slowest mode to every field, making the result their TOld
+        r = stepFactor(self.decayRate, self.dt, self.substeps)
+        for field, change in zip(self.fields, self.changes):
+            field.TOld += change*(r/(1.0 - r))
+            np.copyto(field.T, field.TOld)
+            np.copyto(field.T_prev, field.TOld)
+        return [field.T for field in self.fields]
@@ -0,0 +1,33 @@
+# regression test of the coupled solver: the direct block solve must agree with the block line sweeps,
+# also after the time step of the fields changed
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+from TDMA2DUnsteady import TDMA2DUnsteady
+from coupledTDMA2DUnsteady import CoupledTDMA2DUnsteady
+
+def coupledSolver(method):
+    nX, nY = 12, 10
+    zero = np.zeros((nY, nX))
+    H = 10.0
+    tM = TDMA2DUnsteady(nX, nY, 1.0, 1.0, zero, 0.01, 1.0, 1e-12, 5000, 0.0, 1.0, 0.0, 1.0, H, zero, -H)
+    tP = TDMA2DUnsteady(nX, nY, 1.0, 1.0, zero, 0.01, 0.01, 1e-12, 5000, 0.0, 1.0, 0.0, 1.0, 2*H, zero, -2*H)
+    return CoupledTDMA2DUnsteady(tM, tP, method=method)
+
+def test_directMatchesSweepsAcrossTimeStepChange():
+    direct = coupledSolver('direct')
+    sweeps = coupledSolver('sweeps')
+    for dt in (0.01, 0.05, 0.05, 0.2):
+        direct.advance(dt)
+        sweeps.advance(dt)
+        assert np.abs(direct.T - sweeps.T).max() < 1e-9
+
+def test_steadyAfterTimeStepChange():
+    direct = coupledSolver('direct')
+    sweeps = coupledSolver('sweeps')
+    for solver in (direct, sweeps):
+        solver.advance(0.01)
+        solver.advance(0.2)
+    for steadyDirect, steadySweeps in zip(direct.solveSteady(), sweeps.solveSteady()):
+        assert np.abs(steadyDirect - steadySweeps).max() < 1e-8
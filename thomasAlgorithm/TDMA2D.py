@@ -1,218 +1,700 @@
 # TDMA class used for solving 2D steady state heat conduction problems
-# coordinates are assumed cartesian with uniform grid spacing
-# boundary conditions are assumed Dirichlet
+# coordinates are assumed cartesian with uniform grid spacing, nX and nY need not be equal
+# the conductivity gamma may be uniform, vary per cell, or depend on temperature (a function gamma(T)); face
+# conductivities are harmonic means of the two cells, and gamma(T) is only re-evaluated (and the stencil
+# rebuilt) once the solution has moved more than propertyTol since the last evaluation
+# each face takes a boundary condition (boundaryConditions: Dirichlet, Neumann or Robin, scalar or per cell
+# values; a plain number is a wall temperature) folded into aP and b when the stencil is assembled,
+# or x and/or y can be periodic (periodicX/periodicY), in which case the width/height is one period covered
+# by nX/nY cells and the lines along that direction are cyclic
 # this class uses line by line solving, sweeping both horizontally and vertically
+# the lines of a sweep are handed to the batched Thomas algorithm in batches set by the line ordering
+# (jacobi: all lines at once, zebra: even then odd lines, gs: one line at a time)
+# the stencil and the Thomas factors are built once, the sweeps only refresh the right hand side
+# an over-relaxation factor omega (fixed or tuned automatically) turns the sweeps into line-SOR
+# the assembled system can instead be solved as a sparse matrix (direct LU or preconditioned CG, scipy needed)
+# convergence is judged on the update between iterates or on the normalized residual of the 5 point system
+# backend='numba' runs the sweeps through compiled loop kernels (tdmaKernels), bit for bit equal to the NumPy path
+# an optional profiler (solverProfiler.SolverProfiler) times the solver phases and runs per iteration hooks
+# dtype='float32' halves the memory traffic of the sweeps: fields, coefficients and factors are held in single
+# precision (the factors are still computed in double), residuals are accumulated in double, and refine=True
+# recovers a double precision solution by iterative refinement against the double precision stencil
+# every solve starts from the current T, which setInitialGuess sets (zero for a new object)
 # Author: Jesse Blankenship
-# Last Updated: 9/21/2025
+# Last Updated: 10/18/2026
 
 import numpy as np
+import time
+from contextlib import nullcontext
+from boundaryConditions import asBoundaryCondition
+from tdmaSolver import tdmaSolverBatch, tdmaFactorBatch, tdmaSubstituteBatch, cyclicTdmaFactorBatch, cyclicTdmaSubstituteBatch
 
 class TDMA2D:
 
-    def __init__ (self, nX, nY, width, height, gamma, tol, maxIter, TLeft, TRight, TTop, TBottom):
+    lineOrders = ('jacobi', 'zebra', 'gs')
+    methods = ('sweeps', 'direct', 'cg')
+    preconditioners = ('ilu', 'line', None)
+    backends = ('numpy', 'numba', 'auto')
+
+    def __init__ (self, nX, nY, width, height, gamma, tol, maxIter, TLeft, TRight, TTop, TBottom, lineOrder='zebra', residualTol=None, checkInterval=None, norm='L2', omega=1.0, method='sweeps', preconditioner='ilu', profiler=None, backend='numpy', periodicX=False, periodicY=False, source=None, propertyTol=None, dtype='float64', refine=False):
         self.nX = nX
         self.nY = nY
-        self.deltaX = width/(nX-1)
-        self.deltaY = height/(nY-1)
-        self.gamma = gamma
+        self.periodicX = periodicX # the east face of the last column joins the west face of the first
+        self.periodicY = periodicY # the north face of the last row joins the south face of the first
+        if (periodicX and nX < 3) or (periodicY and nY < 3):
+            raise ValueError("a periodic direction needs at least 3 cells")
+        # a periodic width holds nX cells, a bounded one nX-1 centroid spacings plus two half cells to the walls
+        self.deltaX = width/nX if periodicX else width/(nX-1)
+        self.deltaY = height/nY if periodicY else height/(nY-1)
+        self.gammaFunction = gamma if callable(gamma) else None # gamma(T) -> per cell conductivity
+        self.gamma = None if callable(gamma) else gamma # current cell conductivity, scalar or (nY, nX)
+        self.source = source # volumetric heat source, scalar or (nY, nX), added to b
+        self.propertyTol = propertyTol if propertyTol is not None else tol # change of T that triggers a gamma(T) refresh
         self.tol = tol
         self.maxIter = maxIter
         self.TLeft = TLeft
         self.TRight = TRight
         self.TTop = TTop
         self.TBottom = TBottom
-        self.T_prev = np.zeros((nY, nX))  # initialize temperature array
-        self.T = np.zeros((nY, nX))  # solution array
+        # the condition objects of every face, plain values become Dirichlet conditions
+        self.boundaries = {"left": asBoundaryCondition(TLeft), "right": asBoundaryCondition(TRight),
+                           "top": asBoundaryCondition(TTop), "bottom": asBoundaryCondition(TBottom)}
+        if lineOrder not in self.lineOrders:
+            raise ValueError("lineOrder must be one of %s" % (self.lineOrders,))
+        if lineOrder == 'jacobi' and omega != 1.0:
+            # over-relaxed line Jacobi (line JOR) diverges on this stencil, SOR needs the zebra or gs ordering
+            raise ValueError("lineOrder='jacobi' needs omega=1")
+        if norm not in ('L2', 'Linf'):
+            raise ValueError("norm must be 'L2' or 'Linf'")
+        if method not in self.methods:
+            raise ValueError("method must be one of %s" % (self.methods,))
+        if preconditioner not in self.preconditioners:
+            raise ValueError("preconditioner must be one of %s" % (self.preconditioners,))
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError("dtype must be float32 or float64")
+        if refine and callable(gamma):
+            raise ValueError("refine needs a stencil that does not depend on T")
+        self.dtype = np.dtype(dtype) # working precision of the fields, stencil and factors
+        self.refine = refine # refine the solution against the double precision stencil after every solve
+        if backend not in self.backends:
+            raise ValueError("backend must be one of %s" % (self.backends,))
+        if backend != 'numpy':
+            # Numba is only imported when a compiled backend is asked for
+            import tdmaKernels
+            if backend == 'numba' and not tdmaKernels.available:
+                raise ImportError("backend='numba' needs numba to be installed")
+            # the kernels have no cyclic line solve, so 'auto' stays on NumPy for periodic problems
+            if backend == 'numba' and (periodicX or periodicY):
+                raise ValueError("backend='numba' does not support periodic boundaries")
+            backend = 'numba' if tdmaKernels.available and not (periodicX or periodicY) else 'numpy'
+            self.kernels = tdmaKernels
+        self.backend = backend # 'numpy' or 'numba', the compiled kernels solve a whole batch of lines per call
+        self.method = method # 'sweeps' (line iteration), 'direct' (sparse LU) or 'cg'
+        self.preconditioner = preconditioner # preconditioner of the 'cg' method
+        self.residualTol = residualTol # stop on the normalized residual instead of the update when set
+        # iterations between residual evaluations, by default every iteration when residualTol is set and never otherwise
+        self.checkInterval = checkInterval if checkInterval is not None else (1 if residualTol is not None else 0)
+        self.norm = norm
+        self.history = [] # per iteration convergence record of the last solve
+        self.adaptOmega = omega == 'auto' # estimate omega from the grid and retune it from the observed convergence rate
+        self.omega = 1.0 if self.adaptOmega else float(omega) # relaxation factor applied to every line update
+        self.lineOrder = lineOrder # order in which the lines of a sweep are solved
+        self.profiler = profiler # collects phase timings and counters when set
+
+        # T and T_prev are views into arrays padded by one cell on every side, so neighbours are plain
+        # shifted slices. The padding stays zero and is always multiplied by a zero wall coefficient, except
+        # along a periodic direction, where it holds a copy of the opposite side (see updateGhosts).
+        self.TPad = np.zeros((nY+2, nX+2), dtype=self.dtype)
+        self.T_prevPad = np.zeros((nY+2, nX+2), dtype=self.dtype)
+        self.T = self.TPad[1:-1,1:-1]  # solution array
+        self.T_prev = self.T_prevPad[1:-1,1:-1]  # initialize temperature array
+        self.iterations = 0 # sweeps taken by the last solve
+
+        # each iteration starts with the sweep whose lines are longer, which carries boundary information
+        # furthest per iteration on elongated domains (horizontalSweep solves lines of nY points)
+        if nX > nY:
+            self.sweepOrder = (self.verticalSweep, self.horizontalSweep)
+        else:
+            self.sweepOrder = (self.horizontalSweep, self.verticalSweep)
+
+        self.work = np.zeros((nY, nX), dtype=self.dtype) # work buffer reused outside the sweeps
+        # residuals are always accumulated in double precision
+        self.residualWork = np.zeros((nY, nX))
+        self.residualScratch = np.zeros((nY, nX))
 
-        # the coefficients are sized assuming a square domain
-        self.a = np.zeros((nY, 1))
-        self.b = np.zeros((nY, 1))
-        self.c = np.zeros((nY, 1))
-        self.d = np.zeros((nY, 1))
+        # the matrix never changes during a solve (unless gamma(T) is refreshed), so it is assembled and factored up front
+        with self.phase('properties'):
+            self.evaluateProperties(self.T)
+        with self.phase('assembly'):
+            self.setCoefficients(*self.assembleCoefficients())
+        with self.phase('factorize'):
+            self.factorize()
+        self.rhs = self.b  # constant part of the right hand side seen by the sweeps
+
+        # line-SOR only accelerates a consistently ordered sweep, so it relaxes lines in one direction only,
+        # the one that leaves the weaker coupling to the iteration
+        if self.adaptOmega or self.omega != 1.0:
+            muRows, muColumns = self.lineJacobiRadius()
+            self.sweepOrder = (self.verticalSweep,) if muRows <= muColumns else (self.horizontalSweep,)
+            if self.adaptOmega:
+                self.omega = self.optimalOmega(min(muRows, muColumns)**2)
+
+    def phase(self, name):
+        # timing context of the profiler, does nothing without one
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
 
     def tdmaSolver(self, a, b, c, d):
-        nPoints = np.size(a)
-        
-        # Initialize arrays
-        P = np.zeros(nPoints)
-        Q = np.zeros(nPoints)
-        phi = np.zeros(nPoints)
-
-        P[0] = b[0]/a[0]
-        Q[0] = d[0]/a[0]
-        for i in range(1, nPoints):
-            P[i] = b[i]/(a[i]-c[i]*P[i-1])
-            Q[i] = (d[i] + c[i]*Q[i-1])/(a[i] - c[i]*P[i-1])
-        
-        phi[-1] = Q[-1]
-        for i in range(nPoints-2, -1, -1):
-            phi[i] = P[i]*phi[i+1] + Q[i]
-
-        return phi
-    
-    def horizontalSweep(self):
+        # single line solve, kept for scripts that call it directly
+        return tdmaSolverBatch(np.reshape(a, (1, -1)), np.reshape(b, (1, -1)), np.reshape(c, (1, -1)), np.reshape(d, (1, -1)))[0]
+
+    def evaluateProperties(self, T):
+        # evaluates gamma(T) and caches the face conductivities, which only change with the cell values
+        if self.gammaFunction is not None:
+            self.gamma = np.broadcast_to(self.gammaFunction(T), (self.nY, self.nX)).astype(float)
+            self.TProperties = np.array(T, dtype=float)
+        self.gammaEast, self.gammaNorth = self.faceConductivities(self.gamma)
+
+    def faceConductivities(self, gamma):
+        # harmonic mean conductivity of the east and north face of every cell (the last column/row pairs with the
+        # first, which only a periodic direction uses). Uniform gamma is returned as it is.
+        if np.ndim(gamma) == 0:
+            return gamma, gamma
+        gamma = np.asarray(gamma, dtype=float)
+        harmonic = lambda g1, g2: np.divide(2*g1*g2, g1 + g2, out=np.zeros(g1.shape), where=g1 + g2 > 0)
+        return harmonic(gamma, np.roll(gamma, -1, axis=1)), harmonic(gamma, np.roll(gamma, -1, axis=0))
+
+    def updateProperties(self):
+        # refreshes gamma(T) and rebuilds the stencil when T has moved more than propertyTol since gamma was last
+        # evaluated, returns whether it did
+        if self.gammaFunction is None:
+            return False
+        work = self.work
+        np.subtract(self.T, self.TProperties, out=work)
+        np.abs(work, out=work)
+        if work.max() <= self.propertyTol:
+            return False
+        with self.phase('properties'):
+            self.evaluateProperties(self.T)
+        self.updateCoefficients()
+        if self.profiler is not None:
+            self.profiler.count('propertyUpdates')
+        return True
+
+    def setInitialGuess(self, guess):
+        # starting iterate of the next solve, a scalar or an (nY, nX) field (solutionCache resamples fields of
+        # other grids), gamma(T) is refreshed for it
+        self.T[:,:] = guess
+        np.copyto(self.T_prev, self.T)
+        self.updateProperties()
+
+    def updateCoefficients(self):
+        # reassembles and refactors the stencil after the coefficients changed
+        with self.phase('assembly'):
+            self.setCoefficients(*self.assembleCoefficients())
+        with self.phase('factorize'):
+            self.factorize()
+        self.updateRightHandSide()
+
+    def setCoefficients(self, aP, aN, aS, aE, aW, b):
+        # stores the stencil in the working precision
+        self.aP, self.aN, self.aS, self.aE, self.aW, self.b = (np.asarray(a, dtype=self.dtype) for a in (aP, aN, aS, aE, aW, b))
+        # the sparse matrix and its factorization follow the stencil, also when the line factors are not rebuilt
+        self.matrix = None
+        self.sparseFactor = None
+
+    def updateRightHandSide(self):
+        # the constant part of the right hand side is b itself
+        self.rhs = self.b
+
+    def assembleCoefficients(self):
+        # builds the 5 point stencil aP*T = aN*T_N + aS*T_S + aE*T_E + aW*T_W + b for every cell
+        # faces on the domain boundary are half a cell from the wall, their conditions add to aP and b
         nX = self.nX
         nY = self.nY
-        deltaX = self.deltaX
-        deltaY = self.deltaY
         gamma = self.gamma
-        T_prev = self.T_prev
-        T = self.T
-        a = self.a
-        b = self.b
-        c = self.c
-        d = self.d
-        tBcLeft = self.TLeft
-        tBcRight = self.TRight
-        tBcTop = self.TTop
-        tBcBottom = self.TBottom
-        for i in range(nX):
-            if i == 0: # this is the first vertical line
-                for j in range(nY): # build the coefficients for the first vertical line
-                    if j == 0: # bottom left corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i+1] +(gamma*deltaY/(deltaX/2))*tBcLeft
-                    elif j == nY-1: # top left corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX) * T_prev[j,i+1] +(gamma*deltaY/(deltaX/2))*tBcLeft
-                    else: # left edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i+1] +(gamma*deltaY/(deltaX/2))*tBcLeft
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-            elif i == nX-1: # this is the last vertical line
-                for j in range(nY): # build the coefficients for the last vertical line
-                    if j == 0: # bottom right corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight
-                    elif j == nY-1: # top right corner
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight
-                    else: # right edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2))
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i-1] +(gamma*deltaY/(deltaX/2))*tBcRight
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-            else: # this is an interior vertical line
-                for j in range(nY): # build the coefficients for this interior vertical line
-                    if j == 0: # bottom edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/deltaX)
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = 0
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcBottom + (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1]
-                    elif j == nY-1: # top edge
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2) + gamma*deltaY/deltaX + gamma*deltaY/deltaX)
-                        b[j] = 0
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaX/(deltaY/2))*tBcTop + (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1]
-                    else: # interior points
-                        a[j] = (gamma*deltaX/deltaY + gamma*deltaX/deltaY + gamma*deltaY/deltaX + gamma*deltaY/deltaX)
-                        b[j] = gamma*deltaX/deltaY
-                        c[j] = gamma*deltaX/deltaY
-                        d[j] = (gamma*deltaY/deltaX)*T_prev[j,i+1] + (gamma*deltaY/deltaX)*T_prev[j,i-1]
-                # solve the tridiagonal system for this vertical line
-                T[:,i] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-        return T
+        # cell values give the half cell links to the walls, face values the links between cells
+        aEW = gamma*self.deltaY/self.deltaX
+        aNS = gamma*self.deltaX/self.deltaY
+
+        aN = np.broadcast_to(self.gammaNorth*self.deltaX/self.deltaY, (nY, nX)).copy()
+        aE = np.broadcast_to(self.gammaEast*self.deltaY/self.deltaX, (nY, nX)).copy()
+        # the south face of a cell is the north face of the cell below it
+        aS = np.roll(aN, 1, axis=0)
+        aW = np.roll(aE, 1, axis=1)
+        # a periodic direction keeps the links across its ends (they reach the opposite side) and has no walls
+        if not self.periodicY:
+            aN[-1,:] = 0
+            aS[0,:] = 0
+        if not self.periodicX:
+            aE[:,-1] = 0
+            aW[:,0] = 0
+
+        # interior links plus the boundary contributions
+        aP = aN + aS + aE + aW
+        b = np.zeros((nY, nX))
+        wallNS = np.broadcast_to(2*aNS, (nY, nX))
+        wallEW = np.broadcast_to(2*aEW, (nY, nX))
+        if not self.periodicY:
+            for row, face in ((-1, "top"), (0, "bottom")):
+                aPWall, bWall = self.boundaries[face].coefficients(wallNS[row,:], self.deltaX)
+                aP[row,:] += aPWall
+                b[row,:] += bWall
+        if not self.periodicX:
+            for col, face in ((-1, "right"), (0, "left")):
+                aPWall, bWall = self.boundaries[face].coefficients(wallEW[:,col], self.deltaY)
+                aP[:,col] += aPWall
+                b[:,col] += bWall
+        if self.source is not None:
+            b += self.source*self.deltaX*self.deltaY
+
+        return aP, aN, aS, aE, aW, b
+
+    def paddedSolution(self, T=None):
+        """
+        A solution with the wall temperatures of its boundary conditions around it, (nY+2, nX+2) for plotting.
+        The left and right walls are written last, so they take the corners. Periodic directions are padded
+        with the cells of the opposite side.
+
+        Parameters:
+        T (np.array): (nY, nX) field to pad, the current solution by default
+        """
+        T = self.T if T is None else T
+        linkNS = np.broadcast_to(2*self.gamma*self.deltaX/self.deltaY, T.shape)
+        linkEW = np.broadcast_to(2*self.gamma*self.deltaY/self.deltaX, T.shape)
+        TPad = np.zeros((self.nY+2, self.nX+2))
+        TPad[1:-1,1:-1] = T
+        if self.periodicY:
+            TPad[0,1:-1] = T[-1]
+            TPad[-1,1:-1] = T[0]
+        else:
+            TPad[0,1:-1] = self.boundaries["bottom"].wallTemperature(T[0], linkNS[0], self.deltaX)
+            TPad[-1,1:-1] = self.boundaries["top"].wallTemperature(T[-1], linkNS[-1], self.deltaX)
+        if self.periodicX:
+            TPad[:,0] = TPad[:,-2]
+            TPad[:,-1] = TPad[:,1]
+        else:
+            TPad[1:-1,0] = self.boundaries["left"].wallTemperature(T[:,0], linkEW[:,0], self.deltaY)
+            TPad[1:-1,-1] = self.boundaries["right"].wallTemperature(T[:,-1], linkEW[:,-1], self.deltaY)
+            TPad[[0,-1],0] = TPad[[1,-2],0]
+            TPad[[0,-1],-1] = TPad[[1,-2],-1]
+        return TPad
+
+    def lineBatches(self, nLines):
+        # groups the lines of a sweep into batches solved one after another, as (start, step) pairs
+        # lines within a batch never neighbour each other unless the ordering is jacobi
+        if self.lineOrder == 'jacobi':
+            return [(0, 1)]
+        elif self.lineOrder == 'zebra':
+            return [(start, 2) for start in range(min(2, nLines))]
+        else:
+            return [(start, nLines) for start in range(nLines)]
+
+    def factorize(self):
+        # caches the Thomas factors and work buffers of every batch of lines in both sweep directions
+        # vertical lines use aN/aS as their i+1/i-1 coefficients, horizontal lines use aE/aW
+        nX = self.nX
+        nY = self.nY
+        # the sparse matrix and its factorization follow the stencil, so they are rebuilt on demand
+        self.matrix = None
+        self.sparseFactor = None
+        # T column i is column i+1 of the padded array, so east and west are the slices shifted by +2 and 0
+        self.columnBatches = []
+        for start, step in self.lineBatches(nX):
+            cols = slice(start, nX, step)
+            east = slice(start + 2, nX + 2, step)
+            west = slice(start, nX, step)
+            if self.periodicY:
+                # the cyclic factors take the place of P, there are no separate pivots
+                P, pivots = self.working(cyclicTdmaFactorBatch(self.aP[:,cols].T, self.aN[:,cols].T, self.aS[:,cols].T)), None
+            else:
+                P, pivots = self.working(tdmaFactorBatch(self.aP[:,cols].T, self.aN[:,cols].T, self.aS[:,cols].T))
+            d = np.zeros(self.T[:,cols].shape, dtype=self.dtype)
+            self.columnBatches.append((cols, east, west, P, pivots, d, np.zeros_like(d)))
+        # likewise for rows, with north and south read from the padded rows
+        self.rowBatches = []
+        for start, step in self.lineBatches(nY):
+            rows = slice(start, nY, step)
+            north = slice(start + 2, nY + 2, step)
+            south = slice(start, nY, step)
+            if self.periodicX:
+                P, pivots = self.working(cyclicTdmaFactorBatch(self.aP[rows], self.aE[rows], self.aW[rows])), None
+            else:
+                P, pivots = self.working(tdmaFactorBatch(self.aP[rows], self.aE[rows], self.aW[rows]))
+            d = np.zeros(self.T[rows].shape, dtype=self.dtype)
+            self.rowBatches.append((rows, north, south, P, pivots, d, np.zeros_like(d)))
+        if self.backend == 'numba':
+            # the kernels take the line indices of a batch with contiguous factors
+            self.kernelColumnBatches = [self.kernelBatch(batch) for batch in self.columnBatches]
+            self.kernelRowBatches = [self.kernelBatch(batch) for batch in self.rowBatches]
+
+    def working(self, arrays):
+        # the factors are computed in double precision and stored in the working precision
+        return tuple(np.asarray(a, dtype=self.dtype) for a in arrays)
+
+    def kernelBatch(self, batch):
+        # line indices, factors and work buffer of one kernel call
+        lines = np.arange(batch[0].start, batch[0].stop, batch[0].step)
+        P = np.ascontiguousarray(batch[3])
+        pivots = np.ascontiguousarray(batch[4])
+        return lines, P, pivots, np.zeros_like(P)
+
+    def columnRightHandSide(self, batch):
+        # right hand side of one batch of vertical lines (constant i) from the current east/west neighbours
+        cols, east, west, P, pivots, d, work = batch
+        TPad = self.TPad
+        np.multiply(self.aE[:,cols], TPad[1:-1,east], out=d)
+        np.multiply(self.aW[:,cols], TPad[1:-1,west], out=work)
+        d += work
+        d += self.rhs[:,cols]
+
+    def columnSubstitute(self, batch):
+        # the lines run along j, so the (nY, nCols) arrays are passed transposed
+        cols, east, west, P, pivots, d, work = batch
+        out = self.T[:,cols] if self.omega == 1.0 else d
+        if self.periodicY:
+            cyclicTdmaSubstituteBatch(P, self.aS[:,cols].T, d.T, out=out.T)
+        else:
+            tdmaSubstituteBatch(P, pivots, self.aS[:,cols].T, d.T, out=out.T)
+        if self.omega != 1.0:
+            # the line solution overwrote d, T moves omega of the way towards it
+            self.relax(self.T[:,cols], d, work)
+
+    def rowRightHandSide(self, batch):
+        # right hand side of one batch of horizontal lines (constant j) from the current north/south neighbours
+        rows, north, south, P, pivots, d, work = batch
+        TPad = self.TPad
+        np.multiply(self.aN[rows], TPad[north,1:-1], out=d)
+        np.multiply(self.aS[rows], TPad[south,1:-1], out=work)
+        d += work
+        d += self.rhs[rows]
+
+    def rowSubstitute(self, batch):
+        rows, north, south, P, pivots, d, work = batch
+        out = self.T[rows] if self.omega == 1.0 else d
+        if self.periodicX:
+            cyclicTdmaSubstituteBatch(P, self.aW[rows], d, out=out)
+        else:
+            tdmaSubstituteBatch(P, pivots, self.aW[rows], d, out=out)
+        if self.omega != 1.0:
+            self.relax(self.T[rows], d, work)
+
+    def relax(self, T, TLine, work):
+        # over-relaxed line update, T += omega*(TLine - T)
+        np.subtract(TLine, T, out=work)
+        work *= self.omega
+        T += work
+
+    def updateGhosts(self, TPad=None):
+        # copies the cells next to each periodic end into the padding beyond the opposite end
+        TPad = self.TPad if TPad is None else TPad
+        if self.periodicX:
+            TPad[1:-1,0] = TPad[1:-1,-2]
+            TPad[1:-1,-1] = TPad[1:-1,1]
+        if self.periodicY:
+            TPad[0,1:-1] = TPad[-2,1:-1]
+            TPad[-1,1:-1] = TPad[1,1:-1]
+
+    def horizontalSweep(self):
+        # solves the vertical lines (constant i) batch by batch in the chosen line ordering
+        if self.backend == 'numba':
+            # omega in the working precision, a Python float would make the kernel relax in double precision
+            omega = self.dtype.type(self.omega)
+            for cols, P, pivots, d in self.kernelColumnBatches:
+                self.kernels.columnSweepKernel(self.TPad, self.aE, self.aW, self.aS, self.rhs, cols, P, pivots, d, omega)
+            return self.T
+        for batch in self.columnBatches:
+            if self.periodicX:
+                self.updateGhosts()
+            self.columnRightHandSide(batch)
+            self.columnSubstitute(batch)
+        return self.T
 
     def verticalSweep(self):
+        # solves the horizontal lines (constant j) batch by batch in the chosen line ordering
+        if self.backend == 'numba':
+            omega = self.dtype.type(self.omega)
+            for rows, P, pivots, d in self.kernelRowBatches:
+                self.kernels.rowSweepKernel(self.TPad, self.aN, self.aS, self.aW, self.rhs, rows, P, pivots, d, omega)
+            return self.T
+        for batch in self.rowBatches:
+            if self.periodicY:
+                self.updateGhosts()
+            self.rowRightHandSide(batch)
+            self.rowSubstitute(batch)
+        return self.T
+
+    def maxChange(self):
+        # largest change between the last two iterates, computed in the work buffer
+        work = self.work
+        np.subtract(self.T, self.T_prev, out=work)
+        np.abs(work, out=work)
+        return work.max()
+
+    def lineJacobiRadius(self):
+        # estimates of the line Jacobi spectral radius for lines along x (rows) and along y (columns),
+        # from the lowest Fourier mode of the interior stencil
+        aP = np.median(self.aP)
+        aEW = np.median(self.aE + self.aW)
+        aNS = np.median(self.aN + self.aS)
+        cosX = np.cos(np.pi/(self.nX + 1))
+        cosY = np.cos(np.pi/(self.nY + 1))
+        muRows = aNS*cosY/(aP - aEW*cosX)
+        muColumns = aEW*cosX/(aP - aNS*cosY)
+        return muRows, muColumns
+
+    def optimalOmega(self, rhoGS):
+        # optimal SOR factor for a consistently ordered iteration whose Gauss-Seidel spectral radius is rhoGS
+        return 2.0/(1.0 + np.sqrt(max(1.0 - rhoGS, 0.0)))
+
+    def tuneOmega(self, iter, interval=10):
+        # compares the convergence rate observed over the last two intervals with omega - 1, the rate SOR
+        # reaches at the optimal factor. Once the rate has settled, a slower rate means omega is low, so the
+        # Gauss-Seidel radius is recovered from lambda = rate via (lambda + omega - 1)^2 = lambda*omega^2*mu^2
+        # and omega is raised. Updates that keep growing mean omega is too high and it is pulled back towards 1.
+        if iter - self.omegaChangedAt <= 2*interval or iter % interval != 0:
+            return
+        u = [self.history[k]["update"] for k in (-1-2*interval, -1-interval, -1)]
+        if min(u) <= 0:
+            return
+        rateOld = (u[1]/u[0])**(1.0/interval)
+        rate = (u[2]/u[1])**(1.0/interval)
+        omega = self.omega
+        if rate >= 1.0 and rateOld >= 1.0:
+            self.omega = 1.0 + 0.5*(omega - 1.0)
+            self.omegaChangedAt = iter
+        elif abs(rate - rateOld) < 0.01*rate and rate > 1.05*(omega - 1.0):
+            rhoGS = (rate + omega - 1.0)**2/(rate*omega**2)
+            if rhoGS < 1.0 and self.optimalOmega(rhoGS) > omega:
+                self.omega = min(self.optimalOmega(rhoGS), 1.99)
+                self.omegaChangedAt = iter
+
+    def residualField(self):
+        # residual of every cell of the assembled system, rhs + sum(anb*T_nb) - aP*T, in the residual buffer
+        return self.stencilResidual(self.TPad, (self.aP, self.aN, self.aS, self.aE, self.aW), self.rhs)
+
+    def stencilResidual(self, TPad, stencil, rhs):
+        # residual of the padded field TPad for the given stencil and right hand side, accumulated in double
+        # precision in the residual buffer whatever the precision of the inputs
+        r = self.residualWork
+        work = self.residualScratch
+        aP, aN, aS, aE, aW = stencil
+        self.updateGhosts(TPad)
+        np.multiply(aP, TPad[1:-1,1:-1], out=r, dtype=r.dtype)
+        np.subtract(rhs, r, out=r, dtype=r.dtype)
+        for a, T_nb in ((aE, TPad[1:-1,2:]), (aW, TPad[1:-1,:-2]), (aN, TPad[2:,1:-1]), (aS, TPad[:-2,1:-1])):
+            np.multiply(a, T_nb, out=work, dtype=work.dtype)
+            r += work
+        return r
+
+    def residual(self, norm=None):
+        # normalized residual of the assembled system, ||rhs + sum(anb*T_nb) - aP*T|| / ||rhs||
+        # (the absolute norm is returned when the right hand side is zero)
+        norm = self.norm if norm is None else norm
+        return self.normalizedResidual(self.residualField(), self.rhs, norm)
+
+    def normalizedResidual(self, r, rhs, norm):
+        # ||r||/||rhs|| in double precision (||r|| when the right hand side is zero), r is overwritten
+        work = self.residualScratch
+        np.copyto(work, rhs)
+        if norm == 'Linf':
+            np.abs(r, out=r)
+            rNorm = r.max()
+            np.abs(work, out=work)
+            scale = work.max()
+        else:
+            rNorm = np.sqrt(np.vdot(r, r))
+            scale = np.sqrt(np.vdot(work, work))
+        return rNorm/scale if scale > 0 else rNorm
+
+    def converged(self, update, residual):
+        # residualTol takes over from the update tolerance when it is set
+        if self.residualTol is not None:
+            return residual is not None and residual < self.residualTol
+        return update < self.tol
+
+    def assembleMatrix(self):
+        # the 5 point system as a CSR matrix over cells numbered row by row (k = j*nX + i)
+        # the zero wall coefficients keep the +-1 diagonals from linking the ends of neighbouring rows
+        if self.matrix is None:
+            import scipy.sparse as sparse
+            nX = self.nX
+            nY = self.nY
+            aE = self.aE.copy()
+            aW = self.aW.copy()
+            if self.periodicX:
+                # the links across the periodic ends are taken out of the +-1 diagonals and added on their own
+                aE[:,-1] = 0
+                aW[:,0] = 0
+            diagonals = [self.aP.ravel(), -aE.ravel()[:-1], -aW.ravel()[1:], -self.aN.ravel()[:-nX], -self.aS.ravel()[nX:]]
+            self.matrix = sparse.diags(diagonals, [0, 1, -1, nX, -nX], format='csr')
+            k = np.arange(nX*nY).reshape(nY, nX)
+            rows, cols, values = [], [], []
+            if self.periodicX:
+                rows += [k[:,-1], k[:,0]]
+                cols += [k[:,0], k[:,-1]]
+                values += [-self.aE[:,-1], -self.aW[:,0]]
+            if self.periodicY:
+                rows += [k[-1], k[0]]
+                cols += [k[0], k[-1]]
+                values += [-self.aN[-1], -self.aS[0]]
+            if rows:
+                wrap = sparse.coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=self.matrix.shape)
+                self.matrix = (self.matrix + wrap).tocsr()
+            self.matrix.eliminate_zeros()
+        return self.matrix
+
+    def linePreconditioner(self):
+        # block Jacobi preconditioner whose blocks are the tridiagonal lines along the more strongly coupled
+        # direction, applied with the batched Thomas substitution. It is symmetric, so it can precondition CG.
+        import scipy.sparse.linalg as sparseLinalg
         nX = self.nX
         nY = self.nY
-        deltaX = self.deltaX
-        deltaY = self.deltaY
-        gamma = self.gamma
-        T = self.T
-        a = self.a
-        b = self.b
-        c = self.c
-        d = self.d
-        tBcLeft = self.TLeft
-        tBcRight = self.TRight
-        tBcTop = self.TTop
-        tBcBottom = self.TBottom
-        for j in range(nY):
-                if j == 0: # this is the first (bottom) horizontal line
-                    for i in range(nX): # build the coefficients for the first horizontal line
-                        if i == 0: # bottom left corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j+1,i] +(gamma*deltaX/(deltaY/2))*tBcBottom
-                        elif i == nX-1: # bottom right corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j+1,i] +(gamma*deltaX/(deltaY/2))*tBcBottom
-                        else: # bottom edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/(deltaY/2))*tBcBottom
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-                elif j == nY-1: # this is the last horizontal line (top)
-                    for i in range(nX): # build the coefficients for the last horizontal line
-                        if i == 0: # top left corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop
-                        elif i == nX-1: # top right corner
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop
-                        else: # top edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/(deltaY/2))
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j-1,i] +(gamma*deltaX/(deltaY/2))*tBcTop
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-                else: # this is an interior horizontal line
-                    for i in range(nX): # build the coefficients for this interior horizontal line
-                        if i == 0: # left edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/deltaY)
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = 0
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcLeft + (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i]
-                        elif i == nX-1: # right edge
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/(deltaX/2) + gamma*deltaX/deltaY + gamma*deltaX/deltaY)
-                            b[i] = 0
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaY/(deltaX/2))*tBcRight + (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i]
-                        else: # interior points
-                            a[i] = (gamma*deltaY/deltaX + gamma*deltaY/deltaX + gamma*deltaX/deltaY + gamma*deltaX/deltaY)
-                            b[i] = gamma*deltaY/deltaX
-                            c[i] = gamma*deltaY/deltaX
-                            d[i] = (gamma*deltaX/deltaY)*T[j+1,i] + (gamma*deltaX/deltaY)*T[j-1,i]
-                    # solve the tridiagonal system for this horizontal line
-                    T[j,:] = self.tdmaSolver(a.flatten(), b.flatten(), c.flatten(), d.flatten())
-        return T
-
-    def solve(self):
+        muRows, muColumns = self.lineJacobiRadius()
+        if muRows <= muColumns:
+            P, pivots = tdmaFactorBatch(self.aP, self.aE, self.aW)
+            apply = lambda r: tdmaSubstituteBatch(P, pivots, self.aW, r.reshape(nY, nX)).ravel()
+        else:
+            P, pivots = tdmaFactorBatch(self.aP.T, self.aN.T, self.aS.T)
+            apply = lambda r: tdmaSubstituteBatch(P, pivots, self.aS.T, r.reshape(nY, nX).T).T.ravel()
+        return sparseLinalg.LinearOperator((nX*nY, nX*nY), matvec=apply)
+
+    def solveSparse(self):
+        # solves the assembled system in one go. The LU factors (direct) or the preconditioner (cg) are cached
+        # until the stencil changes, so repeated solves with new right hand sides (time steps) reuse them.
+        import scipy.sparse.linalg as sparseLinalg
+        start = time.perf_counter()
+        with self.phase('sparseFactor'):
+            A = self.assembleMatrix()
+            if self.sparseFactor is None and self.method == 'direct':
+                self.sparseFactor = sparseLinalg.splu(A.tocsc())
+            elif self.sparseFactor is None and self.preconditioner == 'ilu':
+                ilu = sparseLinalg.spilu(A.tocsc(), drop_tol=1e-3, fill_factor=20)
+                self.sparseFactor = sparseLinalg.LinearOperator(A.shape, matvec=ilu.solve)
+            elif self.sparseFactor is None and self.preconditioner == 'line':
+                self.sparseFactor = self.linePreconditioner()
+        with self.phase('sparseSolve'):
+            rhs = np.ascontiguousarray(self.rhs).ravel()
+            if self.method == 'direct':
+                self.T[:,:] = self.sparseFactor.solve(rhs).reshape(self.nY, self.nX)
+                self.iterations = 1
+            else:
+                tol = self.residualTol if self.residualTol is not None else self.tol
+                iterations = [0]
+                def count(x):
+                    iterations[0] += 1
+                x, info = sparseLinalg.cg(A, rhs, x0=np.ascontiguousarray(self.T).ravel(), rtol=tol, maxiter=self.maxIter, M=self.sparseFactor, callback=count)
+                self.T[:,:] = x.reshape(self.nY, self.nX)
+                self.iterations = iterations[0]
+        with self.phase('convergence'):
+            residual = self.residual()
+        self.history = [{"iteration": self.iterations, "residual": float(residual), "update": None, "omega": None, "time": time.perf_counter() - start}]
+        np.copyto(self.T_prev, self.T)
+        if self.profiler is not None:
+            self.profiler.iteration(self, self.history[-1])
+        return self.T
+
+    def solve(self, returnHistory=False):
+        # solves with the chosen method, the line iteration by default
+        if self.refine:
+            # the working precision solves are driven by the refinement, which returns the double precision solution
+            T = self.refineSolution()
+            return (T, self.history) if returnHistory else T
+        if self.method == 'sweeps':
+            self.solveSweeps()
+        else:
+            # gamma(T) is iterated to a fixed point by solving again with the refreshed stencil
+            self.solveSparse()
+            for k in range(self.maxIter):
+                if not self.updateProperties():
+                    break
+                self.solveSparse()
+        if returnHistory:
+            return self.T, self.history
+        return self.T
+
+    def exactRightHandSide(self, b):
+        # double precision right hand side of the system from the double precision b, for refinement
+        return b
+
+    def refineSolution(self, maxRefinements=20, correctionTol=1e-3):
+        """
+        Mixed precision iterative refinement, starting from the current T: the residual is evaluated with the
+        double precision stencil, the working precision solver reduces it by correctionTol, and the correction is
+        added to a double precision copy of the solution. Stops at residualTol (or tol), the double precision
+        solution is kept in TRefined and its rounding in T. self.history holds the last correction solve.
+
+        Parameters:
+        maxRefinements (int): largest number of correction solves
+        correctionTol (float): normalized residual each correction solve is taken to
+        """
+        # the double precision stencil is assembled again rather than kept, so it only costs memory while refining
+        aP, aN, aS, aE, aW, b = self.assembleCoefficients()
+        stencil = (aP, aN, aS, aE, aW)
+        rhs = self.exactRightHandSide(b)
+        target = self.residualTol if self.residualTol is not None else self.tol
+        TPad = self.TPad.astype(float)
+        saved = (self.rhs, self.residualTol, self.checkInterval)
+        correction = np.zeros((self.nY, self.nX), dtype=self.dtype)
+        self.refineHistory = []
+        self.residualTol = correctionTol
+        self.checkInterval = 1
+        with self.phase('refine'):
+            for k in range(maxRefinements + 1):
+                r = self.stencilResidual(TPad, stencil, rhs)
+                np.copyto(correction, r)
+                residual = self.normalizedResidual(r, rhs, self.norm)
+                self.refineHistory.append(float(residual))
+                if residual < target or k == maxRefinements:
+                    break
+                # the correction solve starts from zero with the residual as its right hand side
+                self.rhs = correction
+                self.T[:,:] = 0.0
+                self.T_prev[:,:] = 0.0
+                if self.method == 'sweeps':
+                    self.solveSweeps()
+                else:
+                    self.solveSparse()
+                TPad[1:-1,1:-1] += self.T
+        self.rhs, self.residualTol, self.checkInterval = saved
+        self.TRefined = TPad[1:-1,1:-1]
+        np.copyto(self.T, self.TRefined)
+        np.copyto(self.T_prev, self.T)
+        return self.TRefined
+
+    def solveSweeps(self):
         # method to sweep horizontally and vertically
-        maxIter = self.maxIter
-        iter = 0
-        while iter < maxIter:
-            self.horizontalSweep()
-            self.verticalSweep()
+        # every iteration appends its update, residual (when evaluated) and elapsed wall time to self.history
+        self.history = []
+        self.iterations = 0
+        self.omegaChangedAt = 0
+        profiler = self.profiler
+        # every iteration solves nX vertical lines per horizontalSweep and nY horizontal lines per verticalSweep
+        linesPerIteration = sum(self.nX if sweep == self.horizontalSweep else self.nY for sweep in self.sweepOrder)
+        start = time.perf_counter()
+        for iter in range(1, self.maxIter+1):
+            with self.phase('sweeps'):
+                for sweep in self.sweepOrder:
+                    sweep()
             # convergence check
-            if np.max(np.abs(self.T - self.T_prev)) < self.tol:
+            with self.phase('convergence'):
+                update = self.maxChange()
+                residual = self.residual() if self.checkInterval and iter % self.checkInterval == 0 else None
+            self.history.append({"iteration": iter, "residual": None if residual is None else float(residual), "update": float(update), "omega": self.omega, "time": time.perf_counter() - start})
+            if not np.isfinite(update) or (residual is not None and not np.isfinite(residual)):
+                # a diverged iteration never meets the tolerance, stop instead of sweeping NaNs until maxIter
+                raise FloatingPointError("line iteration diverged at iteration %d (omega = %g)" % (iter, self.omega))
+            self.iterations = iter
+            if profiler is not None:
+                profiler.count('linesSolved', linesPerIteration)
+                profiler.iteration(self, self.history[-1])
+            # a refreshed gamma(T) changes the system, so the iteration carries on with the new stencil
+            refreshed = self.gammaFunction is not None and self.updateProperties()
+            if self.converged(update, residual) and not refreshed:
                 break
+            if self.adaptOmega:
+                self.tuneOmega(iter)
 
-            self.T_prev = np.copy(self.T)
-            iter += 1
+            with self.phase('copy'):
+                np.copyto(self.T_prev, self.T)
 
         return self.T
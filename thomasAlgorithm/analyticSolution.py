@@ -0,0 +1,82 @@
+# analyticSolution evaluates the series solution of 2D steady conduction in a rectangle with a fixed
+# temperature on every edge (Heat Transfer, Nellis and Klein section 2.4.2), used to verify TDMA2D.
+# The problem is split into four problems with one non zero edge each. Every series is evaluated as the
+# product of precomputed mode arrays in x and in y, the sinh ratios are written with exponentials so
+# large mode numbers do not overflow, and modes are only added while their terms exceed a tolerance.
+# Solutions are memoized, repeated verification runs on the same problem reuse them.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+from functools import lru_cache
+
+def sinhRatio(lam, s, length):
+    """
+    sinh(lam*s)/sinh(lam*length) for every mode and point, without overflow for large lam.
+
+    Parameters:
+    lam (np.array): (nModes,) mode eigenvalues
+    s (np.array): (nPoints,) distances from the edge held at zero, 0 <= s <= length
+    length (float): distance between the zero edge and the heated edge
+    """
+    lam = lam[:,None]
+    return np.exp(-lam*(length - s)) * (-np.expm1(-2*lam*s)) / (-np.expm1(-2*lam*length))
+
+def edgeSeries(along, across, lengthAlong, lengthAcross, TEdge, numModes, tol):
+    """
+    Solution for one edge at TEdge with the other three at zero, as an (nAcross, nAlong) array.
+
+    Parameters:
+    along (np.array): coordinates along the heated edge
+    across (np.array): distances from the opposite edge, towards the heated edge
+    lengthAlong, lengthAcross (float): domain size along and across the heated edge
+    TEdge (float): temperature of the heated edge
+    numModes (int): largest number of modes
+    tol (float): modes whose largest term is below tol are left out
+    """
+    if TEdge == 0:
+        return np.zeros((len(across), len(along)))
+    n = np.arange(1, numModes+1)
+    lam = n*np.pi/lengthAlong
+    c = 2*TEdge*(1 - (-1.0)**n)/(n*np.pi)
+    # the sin factor is at most 1 and the sinh ratio is largest at the point nearest the heated edge
+    bound = np.abs(c)*sinhRatio(lam, np.array([across.max()]), lengthAcross)[:,0]
+    used = np.nonzero(bound >= tol)[0]
+    nModes = used[-1] + 1 if len(used) > 0 else 0
+    modesAlong = c[:nModes,None]*np.sin(lam[:nModes,None]*along)
+    modesAcross = sinhRatio(lam[:nModes], across, lengthAcross)
+    return modesAcross.T @ modesAlong
+
+@lru_cache(maxsize=32)
+def analyticSolution(width, height, TLeft, TRight, TTop, TBottom, nX, nY, numModes=200, tol=1e-12):
+    """
+    Series solution on the nX+2 by nY+2 points x = linspace(0, width), y = linspace(0, height) that the
+    TDMA2D solution is compared on, boundary points included. The interior points come from the series,
+    the boundary points take the edge temperatures in the same order TDMA2D results are padded with them.
+    The result is cached and read only, copy it before changing it.
+
+    Parameters:
+    width, height (float): domain size
+    TLeft, TRight, TTop, TBottom (float): edge temperatures
+    nX, nY (int): number of cell centroids in x and y
+    numModes (int): largest number of modes per series
+    tol (float): modes whose terms are all below tol are left out
+    """
+    x = np.linspace(0, width, nX+2)
+    y = np.linspace(0, height, nY+2)
+    xInner = x[1:-1]
+    yInner = y[1:-1]
+
+    T = np.zeros((nY+2, nX+2))
+    interior = T[1:-1,1:-1]
+    interior += edgeSeries(xInner, yInner, width, height, TTop, numModes, tol)
+    interior += edgeSeries(xInner, height - yInner, width, height, TBottom, numModes, tol)
+    interior += edgeSeries(yInner, xInner, height, width, TRight, numModes, tol).T
+    interior += edgeSeries(yInner, width - xInner, height, width, TLeft, numModes, tol).T
+
+    T[0,:] = TBottom
+    T[-1,:] = TTop
+    T[:,0] = TLeft
+    T[:,-1] = TRight
+    T.setflags(write=False)
+    return T
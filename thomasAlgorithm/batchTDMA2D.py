@@ -0,0 +1,255 @@
+# BatchTDMA2D solves K independent TDMA2D (or TDMA2DUnsteady) problems on the same grid together.
+# Small grids spend most of their solve in per line Python overhead, so the stencils of the cases are stacked
+# into (K, nY, nX) arrays and every sweep hands the lines of all cases to one batched Thomas call.
+# The cases may differ in anything that only changes their coefficients (properties, boundary values, sources,
+# time step). Each case has its own convergence test; a converged case is written back to its problem and
+# dropped from the stacked arrays, so the remaining work shrinks as the cases finish.
+# The problems are assembled by their own classes, the batch only reads their stencil, rhs and initial T.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+import time
+from contextlib import nullcontext
+from tdmaSolver import tdmaFactorBatch, tdmaSubstituteBatch
+
+class BatchTDMA2D:
+
+    def __init__(self, problems, profiler=None):
+        """
+        Parameters:
+        problems (list): TDMA2D or TDMA2DUnsteady objects with equal grids, dtype and line ordering; their tol,
+                         residualTol, checkInterval, norm, omega and maxIter are those of the first problem
+        profiler (SolverProfiler): collects phase timings and counters, defaults to the profiler of the first problem
+        """
+        first = problems[0]
+        for problem in problems:
+            if (problem.nX, problem.nY) != (first.nX, first.nY) or problem.dtype != first.dtype:
+                raise ValueError("all problems must have the same grid and dtype")
+            if problem.periodicX or problem.periodicY:
+                raise ValueError("periodic boundaries are not supported by the batched solver")
+            if problem.gammaFunction is not None:
+                # a refreshed gamma(T) would change the stacked stencil of one case in the middle of the sweeps
+                raise ValueError("temperature dependent properties are not supported by the batched solver")
+        if first.adaptOmega:
+            raise ValueError("omega='auto' is not supported by the batched solver, give a fixed omega")
+        self.problems = list(problems)
+        self.nX = first.nX
+        self.nY = first.nY
+        self.dtype = first.dtype
+        self.tol = first.tol
+        self.maxIter = first.maxIter
+        self.residualTol = first.residualTol
+        self.checkInterval = first.checkInterval
+        self.norm = first.norm
+        self.omega = first.omega
+        self.lineOrder = first.lineOrder
+        self.lineBatches = first.lineBatches
+        self.sweepOrder = tuple(getattr(self, sweep.__name__) for sweep in first.sweepOrder)
+        self.profiler = profiler if profiler is not None else first.profiler
+        self.history = [] # per iteration record of the last solve: number of active cases and their largest update
+        self.iterations = np.zeros(len(self.problems), dtype=int) # sweeps each case took in the last solve
+        self.factorize()
+        # stacked fields and work buffers of all cases, reused by every solve until cases drop out
+        nCases = len(self.problems)
+        self.rhsAll = np.zeros((nCases, self.nY, self.nX), dtype=self.dtype)
+        self.TPadAll = np.zeros((nCases, self.nY+2, self.nX+2), dtype=self.dtype)
+        self.T_prevPadAll = np.zeros_like(self.TPadAll)
+        self.TPad, self.T_prevPad = self.TPadAll, self.T_prevPadAll
+        self.fullBuffers = self.allocate()
+
+    def phase(self, name):
+        # timing context of the profiler, does nothing without one
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def factorize(self):
+        # stacks the stencils of all problems and caches the Thomas factors of every batch of lines
+        # has to be called again after the coefficients of any problem changed
+        with self.phase('assembly'):
+            stencil = tuple(np.stack([getattr(problem, name) for problem in self.problems]) for name in ('aP', 'aN', 'aS', 'aE', 'aW'))
+        with self.phase('factorize'):
+            aP, aN, aS, aE, aW = stencil
+            columnFactors = []
+            for start, step in self.lineBatches(self.nX):
+                cols = slice(start, None, step)
+                # the lines of a column batch run along j, so the factors are (K, nCols, nY)
+                factors = tdmaFactorBatch(*(a[:,:,cols].swapaxes(1, 2) for a in (aP, aN, aS)))
+                columnFactors.append(tuple(np.asarray(f, dtype=self.dtype) for f in factors))
+            rowFactors = []
+            for start, step in self.lineBatches(self.nY):
+                rows = slice(start, None, step)
+                factors = tdmaFactorBatch(aP[:,rows], aE[:,rows], aW[:,rows])
+                rowFactors.append(tuple(np.asarray(f, dtype=self.dtype) for f in factors))
+        # the full stack is kept, every solve starts from it with all cases active
+        self.stacked = (stencil, columnFactors, rowFactors)
+
+    def activate(self):
+        # puts every case in the active arrays
+        stencil, self.columnFactors, self.rowFactors = self.stacked
+        self.aP, self.aN, self.aS, self.aE, self.aW = stencil
+        self.cases = np.arange(len(self.problems)) # problems still in the active arrays
+
+    def select(self, keep):
+        # drops the converged cases from the active arrays, keep is a mask over the active cases
+        self.cases = self.cases[keep]
+        self.TPad = self.TPad[keep]
+        self.T_prevPad = self.T_prevPad[keep]
+        self.aP, self.aN, self.aS, self.aE, self.aW, self.rhs = (a[keep] for a in (self.aP, self.aN, self.aS, self.aE, self.aW, self.rhs))
+        self.columnFactors = [(P[keep], pivots[keep]) for P, pivots in self.columnFactors]
+        self.rowFactors = [(P[keep], pivots[keep]) for P, pivots in self.rowFactors]
+        self.allocate()
+
+    def allocate(self, buffers=None):
+        # views and work buffers of the active cases, new buffers unless given. Returns the buffers.
+        self.T = self.TPad[:,1:-1,1:-1]
+        self.T_prev = self.T_prevPad[:,1:-1,1:-1]
+        if buffers is None:
+            # a right hand side and a work buffer per batch of lines
+            columnBuffers = [np.zeros(self.T[:,:,start::step].shape, dtype=self.dtype) for start, step in self.lineBatches(self.nX)]
+            rowBuffers = [np.zeros(self.T[:,start::step].shape, dtype=self.dtype) for start, step in self.lineBatches(self.nY)]
+            buffers = (np.zeros(self.T.shape, dtype=self.dtype), columnBuffers, [np.zeros_like(d) for d in columnBuffers],
+                       rowBuffers, [np.zeros_like(d) for d in rowBuffers])
+        self.work, self.columnBuffers, self.columnWork, self.rowBuffers, self.rowWork = buffers
+        return buffers
+
+    def horizontalSweep(self):
+        # solves the vertical lines (constant i) of every active case
+        TPad = self.TPad
+        for (start, step), (P, pivots), d, work in zip(self.lineBatches(self.nX), self.columnFactors, self.columnBuffers, self.columnWork):
+            cols = slice(start, None, step)
+            # T column i is column i+1 of the padded array
+            np.multiply(self.aE[:,:,cols], TPad[:,1:-1,start+2::step], out=d)
+            np.multiply(self.aW[:,:,cols], TPad[:,1:-1,start:-2:step], out=work)
+            d += work
+            d += self.rhs[:,:,cols]
+            self.substitute(P, pivots, self.aS[:,:,cols].swapaxes(1, 2), d.swapaxes(1, 2), self.T[:,:,cols].swapaxes(1, 2), work.swapaxes(1, 2))
+
+    def verticalSweep(self):
+        # solves the horizontal lines (constant j) of every active case
+        TPad = self.TPad
+        for (start, step), (P, pivots), d, work in zip(self.lineBatches(self.nY), self.rowFactors, self.rowBuffers, self.rowWork):
+            rows = slice(start, None, step)
+            np.multiply(self.aN[:,rows], TPad[:,start+2::step,1:-1], out=d)
+            np.multiply(self.aS[:,rows], TPad[:,start:-2:step,1:-1], out=work)
+            d += work
+            d += self.rhs[:,rows]
+            self.substitute(P, pivots, self.aW[:,rows], d, self.T[:,rows], work)
+
+    def substitute(self, P, pivots, c, d, T, work):
+        # line solutions of a batch, over-relaxed when omega != 1 (d and work are overwritten)
+        if self.omega == 1.0:
+            tdmaSubstituteBatch(P, pivots, c, d, out=T)
+        else:
+            tdmaSubstituteBatch(P, pivots, c, d, out=d)
+            np.subtract(d, T, out=work)
+            work *= self.omega
+            T += work
+
+    def residuals(self):
+        # normalized residual of every active case, in double precision
+        TPad = self.TPad
+        r = self.rhs - self.aP*self.T.astype(float)
+        for a, T_nb in ((self.aE, TPad[:,1:-1,2:]), (self.aW, TPad[:,1:-1,:-2]), (self.aN, TPad[:,2:,1:-1]), (self.aS, TPad[:,:-2,1:-1])):
+            r += a*T_nb.astype(float)
+        rhs = self.rhs.astype(float)
+        if self.norm == 'Linf':
+            rNorm = np.abs(r).max(axis=(1, 2))
+            scale = np.abs(rhs).max(axis=(1, 2))
+        else:
+            rNorm = np.sqrt(np.einsum('kji,kji->k', r, r))
+            scale = np.sqrt(np.einsum('kji,kji->k', rhs, rhs))
+        return np.where(scale > 0, rNorm/np.where(scale > 0, scale, 1.0), rNorm)
+
+    def finish(self, done, iteration):
+        # writes the cases flagged in done back to their problems
+        for k in np.flatnonzero(done):
+            problem = self.problems[self.cases[k]]
+            np.copyto(problem.T, self.T[k])
+            np.copyto(problem.T_prev, self.T[k])
+            problem.iterations = iteration
+            self.iterations[self.cases[k]] = iteration
+
+    def solve(self):
+        """
+        Solves every problem from its current T (the initial guess) with its current rhs, by zebra (or the
+        problems' line ordering) sweeps of all cases at once. The solutions are written to the problems' T.
+
+        Returns:
+        T (np.array): (K, nY, nX) solutions of the problems
+        """
+        with self.phase('rightHandSide'):
+            self.activate()
+            self.rhs, self.TPad, self.T_prevPad = self.rhsAll, self.TPadAll, self.T_prevPadAll
+            for k, problem in enumerate(self.problems):
+                np.copyto(self.rhs[k], problem.rhs)
+                np.copyto(self.TPad[k,1:-1,1:-1], problem.T)
+            np.copyto(self.T_prevPad, self.TPad)
+            self.allocate(self.fullBuffers)
+        self.history = []
+        profiler = self.profiler
+        linesPerCase = sum(self.nX if sweep == self.horizontalSweep else self.nY for sweep in self.sweepOrder)
+        start = time.perf_counter()
+        for iter in range(1, self.maxIter+1):
+            with self.phase('sweeps'):
+                for sweep in self.sweepOrder:
+                    sweep()
+            with self.phase('convergence'):
+                work = self.work
+                np.subtract(self.T, self.T_prev, out=work)
+                np.abs(work, out=work)
+                update = work.max(axis=(1, 2))
+                if self.residualTol is not None:
+                    check = self.checkInterval and iter % self.checkInterval == 0
+                    done = self.residuals() < self.residualTol if check else np.zeros(len(self.cases), dtype=bool)
+                else:
+                    done = update < self.tol
+            self.history.append({"iteration": iter, "active": len(self.cases), "update": float(update.max()), "time": time.perf_counter() - start})
+            if profiler is not None:
+                profiler.count('linesSolved', linesPerCase*len(self.cases))
+                profiler.iteration(self, self.history[-1])
+            if iter == self.maxIter:
+                done[:] = True
+            if done.any():
+                with self.phase('copy'):
+                    self.finish(done, iter)
+                    if done.all():
+                        break
+                    self.select(~done)
+            with self.phase('copy'):
+                np.copyto(self.T_prev, self.T)
+        return np.stack([problem.T for problem in self.problems])
+
+    def advance(self, dt=None, sourceFields=None):
+        """
+        One time step of every TDMA2DUnsteady problem, see TDMA2DUnsteady.advance.
+
+        Parameters:
+        dt (float): time step of all cases, the current one of each case when None
+        sourceFields (list): per case field replacing its coupled material field for this step
+        """
+        if dt is not None:
+            for problem in self.problems:
+                problem.setTimeStep(dt)
+        # the stacked factors replace the line factors of the problems, only their stencils are rebuilt
+        if any(problem.stencilTau != problem.tau for problem in self.problems):
+            for problem in self.problems:
+                problem.updateTimeStep(factorize=False)
+            self.factorize()
+        with self.phase('rightHandSide'):
+            for k, problem in enumerate(self.problems):
+                if sourceFields is not None:
+                    np.copyto(problem.coupledPrev, sourceFields[k])
+                problem.updateRightHandSide()
+                np.copyto(problem.T, problem.TOld)
+        T = self.solve()
+        with self.phase('stepUpdate'):
+            for problem in self.problems:
+                np.subtract(problem.T, problem.TOld, out=problem.work)
+                np.abs(problem.work, out=problem.work)
+                problem.stepChange = problem.work.max()
+                np.copyto(problem.TOld, problem.T)
+                problem.time += problem.tau
+                problem.stepCount += 1
+        if self.profiler is not None:
+            self.profiler.step(self)
+        return T
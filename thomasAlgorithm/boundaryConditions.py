@@ -0,0 +1,70 @@
+# boundaryConditions holds the boundary condition types of the 2D solvers, one object per face.
+# Every condition is folded into the stencil when it is assembled: the face of a boundary cell lies half a
+# cell from the wall, and the condition only adds to that cell's aP and b, so the sweeps never branch on it.
+# Values may be scalars or arrays with one entry per boundary cell of the face (nX for top/bottom,
+# nY for left/right), for spatially varying conditions.
+# A plain number or array given in place of a condition is a Dirichlet value. New condition types only need
+# the coefficients and wallTemperature methods.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+
+class Dirichlet:
+    # fixed wall temperature
+
+    def __init__(self, value):
+        self.value = value
+
+    def coefficients(self, link, area):
+        """
+        Contributions of the face to aP and b of its boundary cells.
+
+        Parameters:
+        link (float or np.array): conductance between the cell centre and the wall, 2*gamma*area/delta
+        area (float): face area of one boundary cell
+        """
+        return link, link*np.asarray(self.value, dtype=float)
+
+    def wallTemperature(self, T, link, area):
+        # temperature on the wall from the boundary cell values T
+        return np.broadcast_to(np.asarray(self.value, dtype=float), np.shape(T))
+
+
+class Neumann:
+    # fixed heat flux through the wall, positive out of the domain (flux = 0 is an insulated wall)
+
+    def __init__(self, flux):
+        self.flux = flux
+
+    def coefficients(self, link, area):
+        return 0.0, -area*np.asarray(self.flux, dtype=float)
+
+    def wallTemperature(self, T, link, area):
+        return T - area*np.asarray(self.flux, dtype=float)/link
+
+
+class Robin:
+    # convection to a fluid at TInf with heat transfer coefficient h, in series with the half cell conduction
+
+    def __init__(self, h, TInf):
+        self.h = h
+        self.TInf = TInf
+
+    def coefficients(self, link, area):
+        hA = area*np.asarray(self.h, dtype=float)
+        total = link*hA/(link + hA)
+        return total, total*np.asarray(self.TInf, dtype=float)
+
+    def wallTemperature(self, T, link, area):
+        hA = area*np.asarray(self.h, dtype=float)
+        return (link*T + hA*np.asarray(self.TInf, dtype=float))/(link + hA)
+
+
+Convective = Robin
+
+def asBoundaryCondition(condition):
+    # wraps a plain wall temperature (scalar or per cell array) in a Dirichlet condition
+    if hasattr(condition, 'coefficients'):
+        return condition
+    return Dirichlet(condition)
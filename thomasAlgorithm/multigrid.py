@@ -0,0 +1,176 @@
+# multigrid accelerates the line by line TDMA2D solver with a geometric multigrid V/W cycle or full multigrid.
+# The sweeps of TDMA2D (line relaxation) are the smoother on every level.
+# Coarse levels agglomerate 2x2 blocks of cells: residuals are restricted by summing the block, corrections
+# are prolongated by linear interpolation between cell centres, and the coarse operator is the sum of the fine
+# equations over each block (piecewise constant Galerkin product) scaled by 1/2, which matches rediscretizing
+# the diffusion operator on the coarse grid.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+import time
+from TDMA2D import TDMA2D
+
+class LevelTDMA2D(TDMA2D):
+    # a TDMA2D whose stencil is given directly rather than assembled from the geometry, used for coarse levels
+
+    def __init__(self, aP, aN, aS, aE, aW, tol=1e-6, maxIter=500, **options):
+        self.stencil = (aP, aN, aS, aE, aW)
+        nY, nX = aP.shape
+        # the geometry arguments only set deltaX/deltaY, which the given stencil does not use
+        super().__init__(nX, nY, nX-1, nY-1, 1.0, tol, maxIter, 0.0, 0.0, 0.0, 0.0, **options)
+
+    def assembleCoefficients(self):
+        # the right hand side of a coarse level is the restricted residual, set by the multigrid cycle
+        aP, aN, aS, aE, aW = self.stencil
+        return aP, aN, aS, aE, aW, np.zeros(aP.shape)
+
+
+def restrict(r, rowStarts, colStarts):
+    """
+    Sums a fine grid field over the coarse cells (2x2 blocks, a lone last row/column forms its own block).
+
+    Parameters:
+    r (np.array): (nY, nX) fine field
+    rowStarts, colStarts (np.array): first fine row/column of every coarse row/column
+    """
+    return np.add.reduceat(np.add.reduceat(r, rowStarts, axis=0), colStarts, axis=1)
+
+
+def interpolationWeights(nFine, starts):
+    # linear interpolation from coarse cell centres to fine cell centres along one direction,
+    # held constant beyond the first and last coarse centres
+    fineCentres = np.arange(nFine) + 0.5
+    coarseCentres = 0.5*(starts + np.append(starts[1:], nFine))
+    upper = np.clip(np.searchsorted(coarseCentres, fineCentres), 1, len(starts) - 1)
+    lower = upper - 1
+    span = coarseCentres[upper] - coarseCentres[lower]
+    weight = np.clip((fineCentres - coarseCentres[lower])/span, 0.0, 1.0) if len(starts) > 1 else np.zeros(nFine)
+    return lower, np.minimum(upper, len(starts) - 1), weight
+
+
+class MultigridTDMA2D:
+
+    def __init__(self, problem, cycle='V', nu1=1, nu2=1, minSize=4, maxLevels=20, coarseTol=1e-6):
+        """
+        Parameters:
+        problem (TDMA2D): assembled problem, its sweeps and options are used to smooth the finest level
+        cycle (str): 'V' or 'W'
+        nu1, nu2 (int): smoothing iterations (one iteration is every sweep in sweepOrder) before and after the coarse correction
+        minSize (int): coarsening stops once either direction has fewer cells than this
+        maxLevels (int): maximum number of levels including the finest
+        coarseTol (float): normalized residual the coarsest level is solved to
+        """
+        if cycle not in ('V', 'W'):
+            raise ValueError("cycle must be 'V' or 'W'")
+        self.problem = problem
+        self.cycleCount = 1 if cycle == 'V' else 2 # coarse visits per cycle
+        self.nu1 = nu1
+        self.nu2 = nu2
+        self.history = []
+
+        # build the hierarchy: every level keeps the fine to coarse maps used to restrict and prolongate
+        self.levels = [problem]
+        self.transfers = []
+        fine = problem
+        # the links across periodic ends restrict onto the coarse end cells, whose lines stay cyclic,
+        # and the coarse levels work in the precision of the problem
+        levelOptions = {"periodicX": problem.periodicX, "periodicY": problem.periodicY, "dtype": problem.dtype}
+        while len(self.levels) < maxLevels and min(fine.nX, fine.nY) >= 2*minSize:
+            rowStarts = np.arange(0, fine.nY, 2)
+            colStarts = np.arange(0, fine.nX, 2)
+            coarse = LevelTDMA2D(*self.coarseOperator(fine, rowStarts, colStarts), tol=coarseTol, lineOrder=problem.lineOrder, **levelOptions)
+            self.transfers.append((rowStarts, colStarts, interpolationWeights(fine.nY, rowStarts), interpolationWeights(fine.nX, colStarts)))
+            self.levels.append(coarse)
+            fine = coarse
+
+        # the coarsest level is solved with automatically tuned line-SOR
+        coarsest = self.levels[-1]
+        if len(self.levels) > 1:
+            self.levels[-1] = LevelTDMA2D(*coarsest.stencil, tol=coarseTol, residualTol=coarseTol, omega='auto', **levelOptions)
+
+    def coarseOperator(self, fine, rowStarts, colStarts):
+        # sums the fine equations over each coarse cell. Links between cells of the same block cancel into the
+        # coarse diagonal, links leaving the block become the coarse neighbour coefficients.
+        nY, nX = fine.nY, fine.nX
+        lastRow = np.zeros(nY, dtype=bool)
+        lastRow[np.append(rowStarts[1:], nY) - 1] = True # rows whose north neighbour is in the next block
+        lastCol = np.zeros(nX, dtype=bool)
+        lastCol[np.append(colStarts[1:], nX) - 1] = True
+        firstRow = np.zeros(nY, dtype=bool)
+        firstRow[rowStarts] = True
+        firstCol = np.zeros(nX, dtype=bool)
+        firstCol[colStarts] = True
+
+        aN = restrict(fine.aN*lastRow[:,None], rowStarts, colStarts)
+        aS = restrict(fine.aS*firstRow[:,None], rowStarts, colStarts)
+        aE = restrict(fine.aE*lastCol[None,:], rowStarts, colStarts)
+        aW = restrict(fine.aW*firstCol[None,:], rowStarts, colStarts)
+        internal = fine.aN*~lastRow[:,None] + fine.aS*~firstRow[:,None] + fine.aE*~lastCol[None,:] + fine.aW*~firstCol[None,:]
+        aP = restrict(fine.aP - internal, rowStarts, colStarts)
+        return 0.5*aP, 0.5*aN, 0.5*aS, 0.5*aE, 0.5*aW
+
+    def prolongate(self, e, transfer):
+        # bilinear interpolation of a coarse correction onto the fine cell centres
+        rowStarts, colStarts, (rowLower, rowUpper, rowWeight), (colLower, colUpper, colWeight) = transfer
+        eCols = e[:,colLower]*(1.0 - colWeight) + e[:,colUpper]*colWeight
+        return eCols[rowLower]*(1.0 - rowWeight)[:,None] + eCols[rowUpper]*rowWeight[:,None]
+
+    def smooth(self, level, iterations):
+        for k in range(iterations):
+            for sweep in level.sweepOrder:
+                sweep()
+
+    def cycle(self, l):
+        # one V or W cycle on level l, improving level.T for the right hand side level.rhs
+        level = self.levels[l]
+        if l == len(self.levels) - 1:
+            level.solve()
+            return
+        self.smooth(level, self.nu1)
+        coarse = self.levels[l+1]
+        rowStarts, colStarts = self.transfers[l][:2]
+        coarse.b[:,:] = restrict(level.residualField(), rowStarts, colStarts)
+        coarse.T[:,:] = 0.0
+        for k in range(self.cycleCount):
+            self.cycle(l+1)
+        level.T[:,:] += self.prolongate(coarse.T, self.transfers[l])
+        self.smooth(level, self.nu2)
+
+    def fullMultigrid(self, l):
+        # nested iteration: the coarse problem for the current residual gives the starting correction,
+        # which one cycle then improves
+        level = self.levels[l]
+        if l == len(self.levels) - 1:
+            level.solve()
+            return
+        coarse = self.levels[l+1]
+        rowStarts, colStarts = self.transfers[l][:2]
+        coarse.b[:,:] = restrict(level.residualField(), rowStarts, colStarts)
+        coarse.T[:,:] = 0.0
+        self.fullMultigrid(l+1)
+        level.T[:,:] += self.prolongate(coarse.T, self.transfers[l])
+        self.cycle(l)
+
+    def solve(self, tol=None, maxCycles=50, fmg=False, returnHistory=False):
+        # cycles until the normalized residual of the finest level is below tol
+        # (default: the problem's residualTol, or its tol when that is not set)
+        problem = self.problem
+        if tol is None:
+            tol = problem.residualTol if problem.residualTol is not None else problem.tol
+        self.history = []
+        start = time.perf_counter()
+        for n in range(1, maxCycles+1):
+            if fmg and n == 1:
+                self.fullMultigrid(0)
+            else:
+                self.cycle(0)
+            residual = problem.residual()
+            self.history.append({"cycle": n, "residual": float(residual), "time": time.perf_counter() - start})
+            if residual < tol:
+                break
+        self.cycles = n
+
+        if returnHistory:
+            return problem.T, self.history
+        return problem.T
@@ -0,0 +1,215 @@
+# solutionCache keeps converged TDMA2D solutions on disk so later solves can start close to their answer.
+# Every entry is keyed by a hash of the problem: grid, geometry, conductivity, boundary conditions and sources.
+# warmStart gives a problem the cached field of the same problem when there is one, otherwise the field of the
+# nearest cached problem of the same kind (same domain, periodicity and boundary condition types), measured
+# on a coarse sampling of its parameters. Fields of other grids are interpolated onto the grid of the problem.
+# The cache holds at most maxBytes of fields, the least recently used entries are evicted first. Files and the
+# index are written to a temporary name and renamed, so an interrupted write never leaves a broken entry.
+# A temperature dependent gamma is keyed by the module and name of its function. Lambdas and nested functions
+# have no such identity (every lambda is '<lambda>'), so problems using them are never cached.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import hashlib
+import json
+import os
+import numpy as np
+
+def linearWeights(nOld, nNew):
+    # lower neighbours and weights of linear interpolation from nOld to nNew evenly spaced points over one span
+    if nOld == 1:
+        return np.zeros(nNew, dtype=int), np.zeros(nNew)
+    x = np.linspace(0, nOld - 1, nNew)
+    lower = np.minimum(np.floor(x).astype(int), nOld - 2)
+    return lower, x - lower
+
+def resampleField(field, nY, nX):
+    """
+    Bilinear interpolation of a cell centred (nYOld, nXOld) field onto nY by nX cells covering the same domain.
+
+    Parameters:
+    field (np.array): field to resample
+    nY, nX (int): size of the new grid
+    """
+    field = np.asarray(field, dtype=float)
+    lower, w = linearWeights(field.shape[0], nY)
+    upper = np.minimum(lower + 1, field.shape[0] - 1)
+    field = field[lower]*(1 - w)[:,None] + field[upper]*w[:,None]
+    lower, w = linearWeights(field.shape[1], nX)
+    upper = np.minimum(lower + 1, field.shape[1] - 1)
+    return field[:,lower]*(1 - w) + field[:,upper]*w
+
+def cacheable(problem):
+    # False when the gamma function of the problem cannot be told apart from other functions by its name
+    function = problem.gammaFunction
+    if function is None:
+        return True
+    name = getattr(function, '__qualname__', None)
+    return name is not None and '<' not in name and getattr(function, '__module__', None) is not None
+
+def problemSignature(problem, resolution=8):
+    """
+    Description of a problem for the cache.
+
+    Parameters:
+    problem (TDMA2D): the problem
+    resolution (int): number of samples per direction of its spatially varying parameters
+
+    Returns:
+    kind (str): the discrete features (class, domain, periodicity, condition types, gamma function) that must
+                match for a cached field to be used
+    vector (np.array): the continuous parameters, sampled onto resolution points per face and direction
+    """
+    nX, nY = problem.nX, problem.nY
+    width = problem.deltaX*(nX if problem.periodicX else nX - 1)
+    height = problem.deltaY*(nY if problem.periodicY else nY - 1)
+    kind = {"class": type(problem).__name__, "width": float("%.12g" % width), "height": float("%.12g" % height),
+            "periodic": [problem.periodicX, problem.periodicY],
+            "boundaries": {face: type(condition).__name__ for face, condition in problem.boundaries.items()},
+            "gamma": None if problem.gammaFunction is None else problem.gammaFunction.__module__ + '.' + problem.gammaFunction.__qualname__,
+            "source": problem.source is not None}
+    samples = []
+    def sample(values, shape):
+        # values broadcast to shape and sampled onto the coarse resolution
+        values = np.broadcast_to(np.asarray(values, dtype=float), shape)
+        return resampleField(values.reshape(shape[0], -1), resolution if shape[0] > 1 else 1, resolution).ravel()
+    if problem.gammaFunction is None:
+        samples.append(sample(problem.gamma, (nY, nX)))
+    if problem.source is not None:
+        samples.append(sample(problem.source, (nY, nX)))
+    for face, condition in sorted(problem.boundaries.items()):
+        length = nX if face in ("top", "bottom") else nY
+        for name, value in sorted(vars(condition).items()):
+            samples.append(sample(value, (1, length)))
+    return json.dumps(kind, sort_keys=True), np.concatenate(samples)
+
+class SolutionCache:
+
+    def __init__(self, directory, maxBytes=256e6):
+        """
+        Parameters:
+        directory (str): directory of the cache, created when missing
+        maxBytes (float): largest total size of the cached fields
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+        self.indexPath = os.path.join(directory, "index.json")
+        self.index = {}
+        if os.path.exists(self.indexPath):
+            with open(self.indexPath) as file:
+                self.index = json.load(file)
+        self.hits = 0 # exact matches found by warmStart
+        self.nearHits = 0 # warm starts from a different problem or grid
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def key(self, problem):
+        # hash of the problem and its grid
+        kind, vector = problemSignature(problem)
+        text = json.dumps([kind, problem.nX, problem.nY, vector.tolist()])
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    def writeIndex(self):
+        with open(self.indexPath + ".tmp", 'w') as file:
+            json.dump(self.index, file)
+        os.replace(self.indexPath + ".tmp", self.indexPath)
+
+    def touch(self, key):
+        # marks an entry as the most recently used one
+        self.index[key]["lastUsed"] = max((entry["lastUsed"] for entry in self.index.values()), default=0) + 1
+
+    def store(self, problem, T=None):
+        """
+        Adds the solution of a problem (its current T by default) to the cache, evicting the least recently used
+        entries beyond maxBytes. Returns the key of the entry, None when the problem is not cacheable.
+        """
+        if not cacheable(problem):
+            return None
+        T = problem.T if T is None else T
+        key = self.key(problem)
+        kind, vector = problemSignature(problem)
+        name = key + ".npy"
+        temporary = os.path.join(self.directory, key + ".tmp.npy")
+        np.save(temporary, np.asarray(T))
+        os.replace(temporary, os.path.join(self.directory, name))
+        self.index[key] = {"kind": kind, "vector": vector.tolist(), "nX": problem.nX, "nY": problem.nY,
+                           "file": name, "bytes": os.path.getsize(os.path.join(self.directory, name)), "lastUsed": 0}
+        self.touch(key)
+        self.evict()
+        self.writeIndex()
+        return key
+
+    def evict(self):
+        # removes the least recently used entries until the cache fits in maxBytes
+        total = sum(entry["bytes"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda key: self.index[key]["lastUsed"]):
+            if total <= self.maxBytes:
+                break
+            total -= self.index[key]["bytes"]
+            path = os.path.join(self.directory, self.index.pop(key)["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def nearest(self, problem, maxDistance=None):
+        """
+        Key of the cached entry closest to a problem and its relative distance (0 for the same problem), or
+        (None, None) when no entry of the same kind is within maxDistance. Among equally close entries the one
+        on the grid of the problem wins, then the finest.
+        """
+        if not cacheable(problem):
+            return None, None
+        key = self.key(problem)
+        if key in self.index:
+            return key, 0.0
+        kind, vector = problemSignature(problem)
+        best, bestRank = None, None
+        for other, entry in self.index.items():
+            if entry["kind"] != kind or len(entry["vector"]) != len(vector):
+                continue
+            difference = np.linalg.norm(vector - np.array(entry["vector"]))
+            scale = max(np.linalg.norm(vector), np.linalg.norm(entry["vector"]), 1e-300)
+            rank = (difference/scale, (entry["nX"], entry["nY"]) != (problem.nX, problem.nY), -entry["nX"]*entry["nY"])
+            if bestRank is None or rank < bestRank:
+                best, bestRank = other, rank
+        if best is None or (maxDistance is not None and bestRank[0] > maxDistance):
+            return None, None
+        return best, bestRank[0]
+
+    def load(self, key, nY=None, nX=None):
+        # cached field of an entry, resampled onto nY by nX cells when given
+        field = np.load(os.path.join(self.directory, self.index[key]["file"]))
+        if nY is not None and field.shape != (nY, nX):
+            field = resampleField(field, nY, nX)
+        return field
+
+    def warmStart(self, problem, maxDistance=None):
+        """
+        Sets the initial guess of a problem from the nearest cached solution (see nearest).
+
+        Parameters:
+        problem (TDMA2D): problem about to be solved
+        maxDistance (float): largest relative parameter distance of a usable entry, any distance when None
+
+        Returns:
+        distance (float): distance of the entry used, None when the problem keeps its own initial guess
+        """
+        key, distance = self.nearest(problem, maxDistance)
+        if key is None:
+            self.misses += 1
+            return None
+        if not os.path.exists(os.path.join(self.directory, self.index[key]["file"])):
+            # removed by another process sharing the cache
+            self.index.pop(key)
+            self.misses += 1
+            return None
+        problem.setInitialGuess(self.load(key, problem.nY, problem.nX))
+        if distance == 0.0 and (self.index[key]["nX"], self.index[key]["nY"]) == (problem.nX, problem.nY):
+            self.hits += 1
+        else:
+            self.nearHits += 1
+        self.touch(key)
+        self.writeIndex()
+        return distance
@@ -0,0 +1,91 @@
+# SolverProfiler collects where the time of a run goes. Solvers given a profiler time their phases
+# (assembly, factorization, sweeps, convergence checks, copies, ...), count lines solved, iterations and
+# time steps, and call the registered hooks after every iteration and every time step. Phases are timed
+# per sweep or per step rather than per line, so the profiler is cheap enough to leave on in production.
+# Phases may nest (a time step contains the sweeps of its solve), so their times are inclusive.
+# With traceMemory the bytes allocated in every phase are also recorded, which slows the run down.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class SolverProfiler:
+
+    def __init__(self, traceMemory=False):
+        """
+        Parameters:
+        traceMemory (bool): record the net bytes allocated in every phase with tracemalloc (slow)
+        """
+        self.traceMemory = traceMemory
+        self.times = {} # cumulative seconds per phase
+        self.calls = {} # number of times each phase ran
+        self.allocated = {} # net bytes allocated per phase, with traceMemory
+        self.counters = {}
+        self.iterationHooks = []
+        self.stepHooks = []
+        self.start = time.perf_counter()
+        if traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        # times the enclosed block and adds it to the phase total
+        if self.traceMemory:
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.traceMemory:
+                self.allocated[name] = self.allocated.get(name, 0) + tracemalloc.get_traced_memory()[0] - before
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def onIteration(self, hook):
+        # hook(solver, entry) runs after every iteration, entry is the iteration's history record
+        self.iterationHooks.append(hook)
+
+    def onStep(self, hook):
+        # hook(solver) runs after every time step
+        self.stepHooks.append(hook)
+
+    def iteration(self, solver, entry):
+        self.count('iterations')
+        for hook in self.iterationHooks:
+            hook(solver, entry)
+
+    def step(self, solver):
+        self.count('steps')
+        for hook in self.stepHooks:
+            hook(solver)
+
+    def summary(self):
+        # wall time since the profiler was created, phase totals and counters as a dict
+        wall = time.perf_counter() - self.start
+        phases = {}
+        for name in sorted(self.times, key=self.times.get, reverse=True):
+            phases[name] = {"time": self.times[name], "calls": self.calls[name], "fraction": self.times[name]/wall if wall > 0 else 0.0}
+            if self.traceMemory:
+                phases[name]["allocated"] = self.allocated[name]
+        return {"wallTime": wall, "phases": phases, "counters": dict(self.counters)}
+
+    def report(self):
+        # the summary as a table
+        summary = self.summary()
+        lines = ["%-20s %10s %10s %7s" % ("phase", "time (s)", "calls", "share")]
+        for name, entry in summary["phases"].items():
+            lines.append("%-20s %10.4f %10d %6.1f%%" % (name, entry["time"], entry["calls"], 100*entry["fraction"]))
+        lines.append("wall time %.4f s" % summary["wallTime"])
+        lines += ["%s: %d" % (name, value) for name, value in summary["counters"].items()]
+        return "\n".join(lines)
+
+    def export(self, path):
+        # writes the summary to a JSON file
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=1)
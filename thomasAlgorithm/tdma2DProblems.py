@@ -1,11 +1,14 @@
 # tdma2DProblems is a solution implementaion for a 2D steady state heat conduction problem with Dirichlet BCs and TDMA solver.
 # Author: Jesse Blankenship
-# Last Updated: 9/21/2025
+# Last Updated: 10/18/2026
 
 import numpy as np
 import matplotlib.pyplot as plt
 from tdmaSolver import tdmaSolver
 from TDMA2D import TDMA2D
+from analyticSolution import analyticSolution
+from solverProfiler import SolverProfiler
+from solutionCache import SolutionCache
 import time
 
 # Problem parameters
@@ -22,60 +25,51 @@ deltaX = width / (nX - 1) # distance between centroids in x
 deltaY = height / (nY - 1) # distance between centroids in y
 maxIter = 1000
 tolerance = 1e-4
+profileFile = "solverProfile.json" # per phase timings and counters of the run are written here
+cacheDirectory = None # e.g. "solutionCache": converged solutions are kept there to warm start re-runs and nearby problems
 
-# Initialize temperature array and coefficient arrays
+# Initialize temperature array
 T = np.zeros((nY, nX))
-T_prev = np.mean(tBcTop+tBcBottom+tBcRight+tBcLeft) * np.ones((nY, nX))
-# array sized with nY but this could also be nX (assuming square domain)
-a = np.zeros((nY,1)); b = np.zeros((nY,1)); c = np.zeros((nY,1)); d = np.zeros((nY,1))
+T_prev = np.mean([tBcTop, tBcBottom, tBcRight, tBcLeft]) * np.ones((nY, nX)) # initial guess, the mean wall temperature
 
+profiler = SolverProfiler()
 time_start = time.time()
 # Initialize TDMA solver
-T = TDMA2D(nX, nY, width, height, gamma, tolerance, maxIter, tBcLeft, tBcRight, tBcTop, tBcBottom)
+problem = TDMA2D(nX, nY, width, height, gamma, tolerance, maxIter, tBcLeft, tBcRight, tBcTop, tBcBottom, profiler=profiler)
+# start from the closest cached solution when there is one, otherwise from the initial guess
+cache = SolutionCache(cacheDirectory) if cacheDirectory is not None else None
+distance = cache.warmStart(problem) if cache is not None else None
+if distance is None:
+    problem.setInitialGuess(T_prev)
+else:
+    print("Warm start from a cached solution at parameter distance", distance)
 # Solve using the solve method
-T = T.solve()
+T = problem.solve()
+print("Iterations: ", problem.iterations)
+if cache is not None:
+    cache.store(problem)
 time_end = time.time()
 print("Time to converge: ", time_end - time_start)
 
 # append the BCs the solution for plotting
-T_numerical = np.zeros((nY+2, nX+2))
-T_numerical[0,:] = tBcBottom
-T_numerical[-1,:] = tBcTop
-T_numerical[:,0] = tBcLeft
-T_numerical[:,-1] = tBcRight
-T_numerical[1:-1,1:-1] = T
+with profiler.phase('padding'):
+    T_numerical = np.zeros((nY+2, nX+2))
+    T_numerical[0,:] = tBcBottom
+    T_numerical[-1,:] = tBcTop
+    T_numerical[:,0] = tBcLeft
+    T_numerical[:,-1] = tBcRight
+    T_numerical[1:-1,1:-1] = T
 
 TSliceHorizontal = T_numerical[nY//2,:]
 TSliceVertical = T_numerical[:,nX//2]
 
 # Analytic Solution for comparison
+# solution is referenced from Heat Transfer, Nellis and Klein section 2.4.2
 numModes = 200
-T_A = np.zeros((nY+2, nX+2))
-c_A = np.zeros(numModes)
-lambda_A = np.zeros(numModes)
-T_B = np.zeros((nY+2, nX+2))
-theta = np.zeros((nY+2, nX+2))
-T_analytic = np.zeros((nY+2, nX+2))
-c_B = np.zeros(numModes)
-lambda_B = np.zeros(numModes)
 x = np.linspace(0, width, nX+2)
 y = np.linspace(0, height, nY+2)
-
-# solution is referenced from Heat Transfer, Nellis and Klein section 2.4.2
-for i in range(numModes):
-    lambda_A[i] = (i+1) * np.pi/width
-    c_A[i] = 2*(tBcTop - tBcLeft) * (-(-1 + (-1)**(i+1))/(i+1)/np.pi)/np.sinh(lambda_A[i]*height)
-    lambda_B[i] = (i+1) * np.pi/height
-    c_B[i] = 2*(tBcRight - tBcBottom) * (-(-1 + (-1)**(i+1))/(i+1)/np.pi)/np.sinh(lambda_B[i]*width)
-
-for i in range(np.size(x)):
-    for j in range(np.size(y)):
-        for k in range(numModes):
-            T_A[j,i] += c_A[k] * np.sin(lambda_A[k] * x[i]) * np.sinh(lambda_A[k] * y[j])
-            T_B[j,i] += c_B[k] * np.sin(lambda_B[k] * y[j]) * np.sinh(lambda_B[k] * x[i])
-
-theta = T_A + T_B
-T_analytic = theta + tBcBottom
+with profiler.phase('analytic'):
+    T_analytic = analyticSolution(width, height, tBcLeft, tBcRight, tBcTop, tBcBottom, nX, nY, numModes)
 TSliceHorizontalAnalytic = T_analytic[nY//2, :]
 TSliceVerticalAnalytic = T_analytic[:, nX//2]
 
@@ -83,6 +77,10 @@ TSliceVerticalAnalytic = T_analytic[:, nX//2]
 deltaHorizontal = np.abs(TSliceHorizontal - TSliceHorizontalAnalytic)/TSliceHorizontalAnalytic
 deltaVertical = np.abs(TSliceVertical - TSliceVerticalAnalytic)/TSliceVerticalAnalytic
 
+# the plots wait for their windows to close, so the profile is reported before them
+print(profiler.report())
+profiler.export(profileFile)
+
 # relative error plots
 plt.figure(1)
 plt.plot(x, deltaHorizontal)
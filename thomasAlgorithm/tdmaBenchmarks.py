@@ -0,0 +1,215 @@
+# tdmaBenchmarks times the TDMA solvers and writes the results to JSON so revisions can be compared.
+# Four groups are measured: the 1D tdmaSolver (and its batched and compiled forms) over the number of points,
+# TDMA2D.solve over the grid size in several solver modes, the stepping throughput of TDMA2DUnsteady, and
+# many small cases solved one by one against BatchTDMA2D.
+# Every entry records wall time, peak traced memory and cells/second, plus iterations, time per sweep and time
+# per line solve where they apply. --compare flags entries that got slower than a saved run.
+# usage: python tdmaBenchmarks.py [--quick] [--output results.json] [--compare baseline.json]
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import tdmaKernels
+from tdmaSolver import tdmaSolver, tdmaSolverBatch
+from TDMA2D import TDMA2D
+from multigrid import MultigridTDMA2D
+from batchTDMA2D import BatchTDMA2D
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fullyImplicitUnsteadyHeat'))
+from TDMA2DUnsteady import TDMA2DUnsteady
+try:
+    # imported up front so the first sparse solve is not charged for loading scipy
+    import scipy.sparse.linalg
+    sparseMethods = ['direct', 'cg']
+except ImportError:
+    sparseMethods = []
+
+# solver modes of the 2D benchmark: TDMA2D options, and the largest grid each mode is run on
+# (plain line iteration needs O(n^2) sweeps, so it is only timed on the smaller grids)
+modes2D = {
+    'zebra': ({}, 200),
+    'zebraNumba': ({'backend': 'numba'}, 500),
+    'zebraFloat32': ({'dtype': 'float32', 'refine': True}, 200),
+    'sor': ({'omega': 'auto'}, 500),
+    'multigrid': ({}, 1000),
+    'direct': ({'method': 'direct'}, 1000),
+    'cg': ({'method': 'cg', 'preconditioner': 'ilu'}, 1000),
+}
+
+def timed(fn):
+    # runs fn once, returns its result and the wall time
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def peakMemory(fn):
+    # peak memory allocated while fn runs. Tracing slows Python level loops several times over, so it is
+    # measured in a run of its own, which may be shortened as long as every buffer is still allocated.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def bestOf(fn, repeats):
+    # shortest wall time of several runs
+    return min(timed(fn)[1] for k in range(repeats))
+
+def bench1D(sizes, repeats=3):
+    # the scalar Thomas algorithm on one system of N points, and the batched one on the same system
+    results = []
+    for n in sizes:
+        a = np.full(n, 2.0)
+        b = np.ones(n)
+        c = np.ones(n)
+        b[-1] = 0
+        c[0] = 0
+        d = np.ones(n)
+        solvers = [('tdmaSolver', lambda: tdmaSolver(a, b, c, d)),
+                   ('tdmaSolverBatch', lambda: tdmaSolverBatch(a[None], b[None], c[None], d[None]))]
+        if tdmaKernels.available:
+            tdmaKernels.tdmaSolverKernel(a[:2], b[:2], c[:2], d[:2]) # compiles (or loads the cache) before timing
+            solvers.append(('tdmaSolverKernel', lambda: tdmaKernels.tdmaSolverKernel(a, b, c, d)))
+        for name, solve in solvers:
+            elapsed = bestOf(solve, repeats if n < 1e5 else 1)
+            results.append({"group": "1D", "solver": name, "n": int(n), "time": elapsed, "timePerLineSolve": elapsed,
+                            "cellsPerSecond": n/elapsed, "peakMemory": peakMemory(solve)})
+            print("1D %-16s n=%-8d %.4g s" % (name, n, elapsed))
+    return results
+
+def bench2D(sizes, modes, tol=1e-6, maxIter=20000):
+    # solves the square test problem of tdma2DProblems to a normalized residual of tol
+    results = []
+    for n in sizes:
+        for mode in modes:
+            options, largest = modes2D[mode]
+            if n > largest:
+                continue
+            def solve(iterations=maxIter):
+                problem = TDMA2D(n, n, 1.0, 1.0, 5.0, tol, iterations, 20.0, 100.0, 100.0, 20.0, residualTol=tol, checkInterval=10, **options)
+                if mode == 'multigrid':
+                    solver = MultigridTDMA2D(problem)
+                    solver.solve(tol=tol, maxCycles=min(iterations, 50))
+                    return problem, solver.cycles, None
+                problem.solve()
+                return problem, problem.iterations, len(problem.sweepOrder) if problem.method == 'sweeps' else None
+            (problem, iterations, sweepsPerIteration), elapsed = timed(solve)
+            # a refined solution is judged by its double precision residual, its float32 rounding cannot reach tol
+            residual = problem.refineHistory[-1] if problem.refine else problem.residual()
+            entry = {"group": "2D", "solver": mode, "n": n, "cells": n*n, "time": elapsed, "iterations": iterations,
+                     "residual": float(residual), "converged": bool(residual < tol), "cellsPerSecond": n*n/elapsed,
+                     "timePerSweep": None, "timePerLineSolve": None, "peakMemory": peakMemory(lambda: solve(2))}
+            if sweepsPerIteration:
+                entry["timePerSweep"] = elapsed/(iterations*sweepsPerIteration)
+                entry["timePerLineSolve"] = entry["timePerSweep"]/n
+            results.append(entry)
+            print("2D %-10s n=%-5d %.4g s, %d iterations, residual %.3g" % (mode, n, elapsed, iterations, residual))
+    return results
+
+def benchUnsteady(sizes, methods, steps=20, tau=0.01):
+    # time steps per second of one TDMA2DUnsteady object stepped through a transient
+    results = []
+    for n in sizes:
+        for method in methods:
+            def run(steps=steps):
+                solver = TDMA2DUnsteady(n, n, 1.0, 1.0, np.zeros((n, n)), tau, 1.0, 1e-6, 1000, 0.0, 1.0, 0.0, 1.0, 0.0, np.zeros((n, n)), 0.0, method=method)
+                iterations = 0
+                for k in range(steps):
+                    solver.advance()
+                    iterations += solver.iterations
+                return iterations
+            iterations, elapsed = timed(run)
+            results.append({"group": "unsteady", "solver": method, "n": n, "cells": n*n, "steps": steps, "time": elapsed,
+                            "timePerStep": elapsed/steps, "iterations": iterations, "cellsPerSecond": n*n*steps/elapsed,
+                            "peakMemory": peakMemory(lambda: run(2))})
+            print("unsteady %-7s n=%-5d %.4g s per step" % (method, n, elapsed/steps))
+    return results
+
+def benchBatch(sizes, nCases=16, tol=1e-6, maxIter=20000):
+    # nCases copies of the 2D test problem with different left wall temperatures, solved one after another
+    # by TDMA2D and together by BatchTDMA2D
+    results = []
+    for n in sizes:
+        def problems():
+            return [TDMA2D(n, n, 1.0, 1.0, 5.0, tol, maxIter, 20.0 + k, 100.0, 100.0, 20.0, residualTol=tol, checkInterval=10) for k in range(nCases)]
+        def sequential():
+            cases = problems()
+            for problem in cases:
+                problem.solve()
+            return sum(problem.iterations for problem in cases)
+        def batched():
+            solver = BatchTDMA2D(problems())
+            solver.solve()
+            return int(solver.iterations.sum())
+        for name, run in (('sequential', sequential), ('batch', batched)):
+            iterations, elapsed = timed(run)
+            results.append({"group": "batch", "solver": name, "n": n, "cells": n*n*nCases, "cases": nCases, "time": elapsed,
+                            "iterations": iterations, "timePerCase": elapsed/nCases, "cellsPerSecond": n*n*nCases/elapsed})
+            print("batch %-10s n=%-5d %.4g s for %d cases" % (name, n, elapsed, nCases))
+    return results
+
+def revision():
+    # git revision of the working tree, marked dirty when it has local changes
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=here, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here, capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '') if commit else None
+    except OSError:
+        return None
+
+def compareResults(baseline, results, threshold=0.1):
+    # entries (matched on group, solver and size) whose time grew by more than threshold relative to the baseline
+    base = {(entry["group"], entry["solver"], entry["n"]): entry for entry in baseline["results"]}
+    slower = []
+    for entry in results["results"]:
+        old = base.get((entry["group"], entry["solver"], entry["n"]))
+        if old is not None and entry["time"] > (1.0 + threshold)*old["time"]:
+            slower.append((entry["group"], entry["solver"], entry["n"], old["time"], entry["time"]))
+    return slower
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of the TDMA solvers")
+    parser.add_argument('--quick', action='store_true', help="small sizes only, for a fast check")
+    parser.add_argument('--output', default='tdmaBenchmarks.json', help="JSON file the results are written to")
+    parser.add_argument('--compare', default=None, help="earlier results to report slowdowns against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported by --compare")
+    args = parser.parse_args()
+
+    if args.quick:
+        sizes1D = [10, 1000, 100000]
+        sizes2D = [25, 50, 100]
+        sizesUnsteady = [25, 50]
+        sizesBatch = [25]
+    else:
+        sizes1D = [10, 100, 1000, 10000, 100000, 1000000]
+        sizes2D = [25, 50, 100, 200, 500, 1000]
+        sizesUnsteady = [25, 50, 100, 200]
+        sizesBatch = [25, 50]
+
+    results = {"revision": revision(), "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'), "python": platform.python_version(),
+               "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count()}
+    # the sparse modes are left out when scipy is not installed, the compiled ones when numba is not
+    modes = [mode for mode in modes2D if (modes2D[mode][0].get('method', 'sweeps') == 'sweeps' or mode in sparseMethods)
+             and (modes2D[mode][0].get('backend', 'numpy') == 'numpy' or tdmaKernels.available)]
+    unsteadyMethods = ['sweeps'] + sparseMethods[:1]
+    results["results"] = bench1D(sizes1D) + bench2D(sizes2D, modes) + benchUnsteady(sizesUnsteady, unsteadyMethods) + benchBatch(sizesBatch)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=1)
+    print("results written to", args.output)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        slower = compareResults(baseline, results, args.threshold)
+        for group, solver, n, old, new in slower:
+            print("slower: %s %s n=%d %.4g s -> %.4g s" % (group, solver, n, old, new))
+        if not slower:
+            print("no entry is more than %d%% slower than %s" % (100*args.threshold, args.compare))
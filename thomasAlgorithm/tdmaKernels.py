@@ -0,0 +1,108 @@
+# tdmaKernels holds compiled loop kernels for the Thomas algorithm and the TDMA2D half sweeps.
+# The kernels are compiled with Numba when it is installed (cached to disk, so only the first run compiles),
+# and TDMA2D uses them with backend='numba'. Every kernel performs the same floating point operations in the
+# same order as the NumPy path (no fastmath), so the results are bit for bit identical.
+# Without Numba the functions remain plain Python, which is correct but far too slow to be used.
+# Author: Jesse Blankenship
+# Last Updated: 10/18/2026
+
+import numpy as np
+
+try:
+    import numba
+    jit = numba.njit(cache=True)
+    available = True
+except ImportError:
+    numba = None
+    available = False
+    def jit(function):
+        return function
+
+@jit
+def tdmaSolverKernel(a, b, c, d):
+    # compiled form of tdmaSolver.tdmaSolver for one system
+    nPoints = a.shape[0]
+    P = np.zeros(nPoints)
+    Q = np.zeros(nPoints)
+    phi = np.zeros(nPoints)
+    P[0] = b[0]/a[0]
+    Q[0] = d[0]/a[0]
+    for i in range(1, nPoints):
+        P[i] = b[i]/(a[i] - c[i]*P[i-1])
+        Q[i] = (d[i] + c[i]*Q[i-1])/(a[i] - c[i]*P[i-1])
+    phi[-1] = Q[-1]
+    for i in range(nPoints-2, -1, -1):
+        phi[i] = P[i]*phi[i+1] + Q[i]
+    return phi
+
+@jit
+def backSubstitute(P, d, l):
+    # back substitution of line l of a factored batch (see tdmaFactorBatch), d[l] holds Q on entry
+    nPoints = d.shape[1]
+    for i in range(nPoints-2, -1, -1):
+        d[l,i] += P[l,i]*d[l,i+1]
+
+@jit
+def rowSweepKernel(TPad, aN, aS, aW, rhs, rows, P, pivots, d, omega):
+    """
+    One batch of horizontal lines (constant j) of TDMA2D.verticalSweep: every right hand side of the batch
+    is built from the current neighbours before any line is written, as in the NumPy sweeps of TDMA2D.
+
+    Parameters:
+    TPad (np.array): (nY+2, nX+2) padded solution, updated in place
+    aN, aS, aW, rhs (np.array): (nY, nX) stencil coefficients and constant right hand side
+    rows (np.array): indices j of the lines in the batch
+    P, pivots (np.array): (nLines, nX) Thomas factors of the lines
+    d (np.array): (nLines, nX) work buffer
+    omega (float): relaxation factor, in the precision of TPad
+    """
+    nLines, nPoints = d.shape
+    for l in range(nLines):
+        j = rows[l]
+        for i in range(nPoints):
+            value = aN[j,i]*TPad[j+2,i+1]
+            value += aS[j,i]*TPad[j,i+1]
+            d[l,i] = value + rhs[j,i]
+    for l in range(nLines):
+        j = rows[l]
+        d[l,0] = d[l,0]*pivots[l,0]
+        for i in range(1, nPoints):
+            d[l,i] = (d[l,i] + aW[j,i]*d[l,i-1])*pivots[l,i]
+        backSubstitute(P, d, l)
+        for i in range(nPoints):
+            if omega == 1.0:
+                TPad[j+1,i+1] = d[l,i]
+            else:
+                TPad[j+1,i+1] += (d[l,i] - TPad[j+1,i+1])*omega
+
+@jit
+def columnSweepKernel(TPad, aE, aW, aS, rhs, cols, P, pivots, d, omega):
+    """
+    One batch of vertical lines (constant i) of TDMA2D.horizontalSweep, see rowSweepKernel.
+
+    Parameters:
+    TPad (np.array): (nY+2, nX+2) padded solution, updated in place
+    aE, aW, aS, rhs (np.array): (nY, nX) stencil coefficients and constant right hand side
+    cols (np.array): indices i of the lines in the batch
+    P, pivots (np.array): (nLines, nY) Thomas factors of the lines
+    d (np.array): (nLines, nY) work buffer
+    omega (float): relaxation factor, in the precision of TPad
+    """
+    nLines, nPoints = d.shape
+    for l in range(nLines):
+        i = cols[l]
+        for j in range(nPoints):
+            value = aE[j,i]*TPad[j+1,i+2]
+            value += aW[j,i]*TPad[j+1,i]
+            d[l,j] = value + rhs[j,i]
+    for l in range(nLines):
+        i = cols[l]
+        d[l,0] = d[l,0]*pivots[l,0]
+        for j in range(1, nPoints):
+            d[l,j] = (d[l,j] + aS[j,i]*d[l,j-1])*pivots[l,j]
+        backSubstitute(P, d, l)
+        for j in range(nPoints):
+            if omega == 1.0:
+                TPad[j+1,i+1] = d[l,j]
+            else:
+                TPad[j+1,i+1] += (d[l,j] - TPad[j+1,i+1])*omega
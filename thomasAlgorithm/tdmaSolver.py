@@ -1,7 +1,11 @@
 # tdmaSolver.py
 # A Python implementation of the Thomas algorithm for solving tridiagonal systems of equations.
+# tdmaSolverBatch solves a stack of independent systems (e.g. every line of a 2D sweep) in one call.
+# tdmaFactorBatch/tdmaSubstituteBatch split that solve so the factors of a fixed matrix can be reused.
+# cyclicTdmaFactorBatch/cyclicTdmaSubstituteBatch solve periodic (cyclic) lines with the Sherman-Morrison formula.
+# blockTdmaFactorBatch/blockTdmaSubstituteBatch do the same for lines of 2x2 blocks (two coupled fields).
 # Author: Jesse Blankenship
-# Last Updated: 9/13/2025
+# Last Updated: 10/18/2026
 
 import numpy as np
 
@@ -33,4 +37,217 @@ def tdmaSolver(a, b, c, d):
     for i in range(nPoints-2, -1, -1):
         phi[i] = P[i]*phi[i+1] + Q[i]
 
-    return phi
\ No newline at end of file
+    return phi
+
+def tdmaFactorBatch(a, b, c):
+    """
+    Runs the part of the Thomas forward elimination that only depends on the matrix, for a stack of
+    independent tridiagonal systems. When the matrix is fixed the result can be cached and every new
+    right hand side only needs tdmaSubstituteBatch.
+
+    Parameters:
+    a (np.array): (nLines, nPoints) coefficients of the main diagonal (phi at i), any leading axes
+                  (e.g. (nCases, nLines, nPoints)) are further independent lines
+    b (np.array): (nLines, nPoints) coefficients of phi at i+1
+    c (np.array): (nLines, nPoints) coefficients of phi at i-1
+
+    Returns:
+    P (np.array): (nLines, nPoints) elimination coefficients
+    pivots (np.array): (nLines, nPoints) reciprocals of the eliminated diagonal, 1/(a - c*P[i-1])
+    """
+
+    # work on (nPoints, nLines) views so each step of the recurrence is one slice over all lines. The transposed
+    # inputs are strided views (no copy), only the freshly allocated P and pivots are contiguous along the lines.
+    a = np.asarray(a, dtype=float).T
+    b = np.asarray(b, dtype=float).T
+    c = np.asarray(c, dtype=float).T
+    nPoints = a.shape[0]
+
+    P = np.zeros(a.shape)
+    pivots = np.zeros(a.shape)
+
+    pivots[0] = 1.0/a[0]
+    P[0] = b[0]*pivots[0]
+    for i in range(1, nPoints):
+        pivots[i] = 1.0/(a[i] - c[i]*P[i-1])
+        P[i] = b[i]*pivots[i]
+
+    return P.T, pivots.T
+
+
+def tdmaSubstituteBatch(P, pivots, c, d, out=None):
+    """
+    Solves a stack of factored tridiagonal systems for a new right hand side (see tdmaFactorBatch).
+
+    Parameters:
+    P (np.array): (nLines, nPoints) elimination coefficients from tdmaFactorBatch
+    pivots (np.array): (nLines, nPoints) pivots from tdmaFactorBatch
+    c (np.array): (nLines, nPoints) coefficients of phi at i-1
+    d (np.array): (nLines, nPoints) constants for the equation defining phi at i
+    out (np.array): optional (nLines, nPoints) array the solution is written into
+    (leading axes beyond nLines are handled as in tdmaFactorBatch)
+    """
+
+    P = np.asarray(P).T
+    pivots = np.asarray(pivots).T
+    c = np.asarray(c).T
+    d = np.asarray(d).T
+    nPoints = P.shape[0]
+    phi = np.zeros(P.shape) if out is None else out.T
+
+    # forward pass builds Q in place of phi
+    phi[0] = d[0]*pivots[0]
+    for i in range(1, nPoints):
+        phi[i] = (d[i] + c[i]*phi[i-1])*pivots[i]
+
+    # back substitution
+    for i in range(nPoints-2, -1, -1):
+        phi[i] += P[i]*phi[i+1]
+
+    return phi.T
+
+
+def tdmaSolverBatch(a, b, c, d):
+    """
+    Solves many independent tridiagonal systems at once using the Thomas algorithm.
+    Each row of the inputs is one system (one grid line). The recurrence still runs point by point,
+    but every line is advanced together so the per-point work is array arithmetic.
+
+    Parameters:
+    a (np.array): (nLines, nPoints) coefficients of the main diagonal (phi at i)
+    b (np.array): (nLines, nPoints) coefficients of phi at i+1
+    c (np.array): (nLines, nPoints) coefficients of phi at i-1
+    d (np.array): (nLines, nPoints) constants for the equation defining phi at i
+    """
+
+    P, pivots = tdmaFactorBatch(a, b, c)
+    return tdmaSubstituteBatch(P, pivots, np.asarray(c, dtype=float), np.asarray(d, dtype=float))
+
+
+def cyclicTdmaFactorBatch(a, b, c):
+    """
+    Factors a stack of cyclic tridiagonal systems, where the first point of every line also links to the last
+    one through c[:,0] and the last point links to the first through b[:,-1]. The cyclic matrix is split into
+    a tridiagonal matrix plus a rank one correction (Sherman-Morrison), whose tridiagonal part is factored with
+    tdmaFactorBatch together with the correction vector, so each right hand side costs one substitution.
+
+    Parameters:
+    a (np.array): (nLines, nPoints) coefficients of the main diagonal (phi at i), nPoints >= 3
+    b (np.array): (nLines, nPoints) coefficients of phi at i+1, b[:,-1] multiplies phi at 0
+    c (np.array): (nLines, nPoints) coefficients of phi at i-1, c[:,0] multiplies phi at nPoints-1
+
+    Returns:
+    factors (tuple): P, pivots, correction vector z, weight of its last point and denominator of the correction
+    """
+
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    c = np.asarray(c, dtype=float)
+    # the corner entries of the matrix are -c[:,0] (row 0) and -b[:,-1] (last row)
+    gamma = -a[:,0]
+    ratio = c[:,0]/a[:,0] # beta/gamma with beta = -c[:,0]
+    aT = a.copy()
+    aT[:,0] -= gamma
+    aT[:,-1] += b[:,-1]*ratio # minus alpha*beta/gamma with alpha = -b[:,-1]
+    P, pivots = tdmaFactorBatch(aT, b, c)
+
+    u = np.zeros(a.shape)
+    u[:,0] = gamma
+    u[:,-1] = -b[:,-1]
+    z = tdmaSubstituteBatch(P, pivots, c, u)
+    denominator = 1.0 + z[:,0] + ratio*z[:,-1]
+    return P, pivots, z, ratio, denominator
+
+
+def cyclicTdmaSubstituteBatch(factors, c, d, out=None):
+    """
+    Solves a stack of factored cyclic tridiagonal systems for a new right hand side (see cyclicTdmaFactorBatch).
+
+    Parameters:
+    factors (tuple): result of cyclicTdmaFactorBatch
+    c (np.array): (nLines, nPoints) coefficients of phi at i-1
+    d (np.array): (nLines, nPoints) constants for the equation defining phi at i
+    out (np.array): optional (nLines, nPoints) array the solution is written into
+    """
+
+    P, pivots, z, ratio, denominator = factors
+    phi = tdmaSubstituteBatch(P, pivots, c, d, out=out)
+    correction = (phi[:,0] + ratio*phi[:,-1])/denominator
+    phi -= correction[:,None]*z
+    return phi
+
+
+def inverse2x2(m):
+    # inverse of a stack of 2x2 matrices (..., 2, 2) from the closed form
+    det = m[...,0,0]*m[...,1,1] - m[...,0,1]*m[...,1,0]
+    inv = np.empty(m.shape)
+    inv[...,0,0] = m[...,1,1]/det
+    inv[...,0,1] = -m[...,0,1]/det
+    inv[...,1,0] = -m[...,1,0]/det
+    inv[...,1,1] = m[...,0,0]/det
+    return inv
+
+
+def blockTdmaFactorBatch(a, b, c):
+    """
+    Forward elimination of the block Thomas algorithm for a stack of block tridiagonal systems whose
+    unknowns are pairs of coupled fields, A_i x_i = B_i x_i+1 + C_i x_i-1 + d_i. The diagonal blocks are
+    full 2x2 matrices, the neighbour blocks only link a field to itself and are stored as their diagonals.
+
+    Parameters:
+    a (np.array): (nLines, nPoints, 2, 2) diagonal blocks
+    b (np.array): (nLines, nPoints, 2) coefficients of x at i+1
+    c (np.array): (nLines, nPoints, 2) coefficients of x at i-1
+
+    Returns:
+    P (np.array): (nLines, nPoints, 2, 2) elimination blocks
+    pivots (np.array): (nLines, nPoints, 2, 2) inverses of the eliminated diagonal blocks
+    """
+
+    a = np.swapaxes(np.asarray(a, dtype=float), 0, 1)
+    b = np.swapaxes(np.asarray(b, dtype=float), 0, 1)
+    c = np.swapaxes(np.asarray(c, dtype=float), 0, 1)
+    nPoints = a.shape[0]
+
+    P = np.zeros(a.shape)
+    pivots = np.zeros(a.shape)
+
+    pivots[0] = inverse2x2(a[0])
+    P[0] = pivots[0]*b[0][...,None,:]
+    for i in range(1, nPoints):
+        # D_i = A_i - C_i P_i-1, P_i = D_i^-1 B_i with C_i, B_i diagonal
+        pivots[i] = inverse2x2(a[i] - c[i][...,:,None]*P[i-1])
+        P[i] = pivots[i]*b[i][...,None,:]
+
+    return np.swapaxes(P, 0, 1), np.swapaxes(pivots, 0, 1)
+
+
+def blockTdmaSubstituteBatch(P, pivots, c, d, out=None):
+    """
+    Solves a stack of factored block tridiagonal systems for a new right hand side (see blockTdmaFactorBatch).
+
+    Parameters:
+    P (np.array): (nLines, nPoints, 2, 2) elimination blocks from blockTdmaFactorBatch
+    pivots (np.array): (nLines, nPoints, 2, 2) pivots from blockTdmaFactorBatch
+    c (np.array): (nLines, nPoints, 2) coefficients of x at i-1
+    d (np.array): (nLines, nPoints, 2) constants for the equations at i
+    out (np.array): optional (nLines, nPoints, 2) array the solution is written into
+    """
+
+    P = np.swapaxes(P, 0, 1)
+    pivots = np.swapaxes(pivots, 0, 1)
+    c = np.swapaxes(np.asarray(c), 0, 1)
+    d = np.swapaxes(np.asarray(d), 0, 1)
+    nPoints = P.shape[0]
+    x = np.zeros(d.shape) if out is None else np.swapaxes(out, 0, 1)
+
+    # forward pass builds Q in place of x
+    x[0] = np.matmul(pivots[0], d[0][...,None])[...,0]
+    for i in range(1, nPoints):
+        x[i] = np.matmul(pivots[i], (d[i] + c[i]*x[i-1])[...,None])[...,0]
+
+    # back substitution
+    for i in range(nPoints-2, -1, -1):
+        x[i] += np.matmul(P[i], x[i+1][...,None])[...,0]
+
+    return np.swapaxes(x, 0, 1)